@@ -1,33 +1,99 @@
+from __future__ import absolute_import, division, print_function, annotations
+
+# Time of launch, used to measure time to first sample. Taken before other imports so their time is included.
+import time
+launch_time_ns = time.perf_counter_ns()
+
 # Used by Controller
-from __future__ import absolute_import, division, print_function
 from builtins import *
-from mcculw import ul
-from mcculw.enums import ULRange, InfoType, BoardInfo, AiChanType, AnalogInputMode, TcType, TempScale, TInOptions
+from mcculw.enums import ULRange, InfoType, BoardInfo, AiChanType, AnalogInputMode, TcType, TempScale, TInOptions, ScanOptions, ErrorCode
+from ctypes import cast, POINTER, c_double, c_float, addressof
+
+# Loads MCC driver. If it can't be loaded, the error is kept so the app can show it. See SimulatedBoard for running
+# without the driver.
+driver_error = None
+try:
+    from mcculw import ul
+    from mcculw.ul import ULError
+except Exception as e:
+    driver_error = e
+    ul = None
+    ULError = Exception
 
 # Used by all classes
 import numpy as np
 
 # Used by Plot & App
 from tkinter import *
+from tkinter import messagebox
+import sys
 
 # Used by Plot
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from matplotlib import style
+import bisect
+from collections import deque
 
-# Used by App
-import time
+# Used by App, Acquisition & ExportWorker
+import threading
+import queue
 
 # Used by DataHandler
-import pandas as pd
 import os
-import xlsxwriter
+import tempfile
+
+# Used by SessionFile & CalibrationCache
+import json
+import struct
+import zlib
+import hashlib
+
+# Used by Timings
+from contextlib import contextmanager
+
+# Used by App for profiling
+from tkinter import simpledialog
+import cProfile
+import pstats
+import tracemalloc
+import io
+
+# Used to load slow modules on first use
+import importlib
+
+
+class LazyModule:
+
+    def __init__(self, name: str):
+        """
+        Module that is only imported when one of its attributes is first used, so slow imports such as pandas and
+        matplotlib don't delay startup. Use in place of an import, i.e. pd = LazyModule('pandas').
+
+        :param name: Full name of module, i.e. 'matplotlib.figure'
+        """
+        self.name = name
+        self.module = None
+
+    def __getattr__(self, attribute):
+        if self.module is None:
+            with Timings.span('import ' + self.name):
+                self.module = importlib.import_module(self.name)
+        return getattr(self.module, attribute)
+
+
+# Used by Plot. Matplotlib is loaded when the first plot is made.
+backend_tkagg = LazyModule('matplotlib.backends.backend_tkagg')
+figure = LazyModule('matplotlib.figure')
+style = LazyModule('matplotlib.style')
+
+# Used by DataHandler, Calibration & Timings. Pandas is loaded on first use, i.e. the first export, and xlsxwriter by
+# pandas on the first Excel export.
+pd = LazyModule('pandas')
 
 
 class App(Tk):
 
 
-    def __init__(self, refresh_time: int, *args, **kwargs):
+    def __init__(self, refresh_time: int, sample_time: int = None, thermocouple_sample_time: int = None,
+                 conductivity_sample_time: int = None, *args, **kwargs):
         """
         Main App class.
         Application specific initialization code is everything in __init__() from Windows settings down.
@@ -37,37 +103,50 @@ class App(Tk):
         To add/remove conductivity channel change self.conductivity_channels
         To add/remove VDAC pump channels change self.pump_VDAC_channels.
 
-        Calibration values are required for pump VDAC channels. See Pump Calibration spreadsheet in calibrations directory
+        Calibrations are required for pump VDAC channels. They are fitted to the Pump Calibration spreadsheet in the
+        calibrations directory at startup, see self.pump_calibration_sheets.
 
-        :param refresh_time: Time in ms for refresh. Use whole numbers (i.e. 1000, 2000, 5000, etc).
+        :param refresh_time: Time in ms for refresh. Periods below 100 ms are supported.
+        :param sample_time: Time in ms between board reads. Board is read on its own thread, so this can differ from refresh_time. Defaults to refresh_time.
+        :param thermocouple_sample_time: Time in ms between thermocouple reads. Defaults to sample_time.
+        :param conductivity_sample_time: Time in ms between conductivity and pump flowrate samples. Defaults to sample_time.
         """
         Tk.__init__(self, *args, **kwargs)
 
         # Initializes refresh rate to update main thread
         self.refresh_time = refresh_time
 
-        # Initializes application start time
-        self.start_time = time.time()
-        self.start_time_adjusted = False
+        # Initializes sample rate to read board
+        self.sample_time = sample_time if sample_time is not None else refresh_time
 
-        # Initializes variable to account for time lost to rounding when regulating app runtime
-        self.rounding_time_loss = 0
+        # Initializes sample rate of each channel group. Groups are read independently, so slow sensors don't hold back fast ones.
+        self.group_sample_times = {'thermocouple': thermocouple_sample_time or self.sample_time,
+                                   'conductivity': conductivity_sample_time or self.sample_time}
 
-        # Initializes runtime array to track each time when main_thread() is executed. Used for data collection and timing.
-        self.runtime = []
+        # Schedules main_update(). Late updates are skipped, as each update handles all samples read since the last.
+        self.scheduler = Scheduler(self.refresh_time, overrun='skip')
 
 
         # Window settings
         self.geometry('+500+200')
-        self.title('MCC-DAQ')
+        self.title('MCC-DAQ - SIMULATED' if Controller.is_simulated() else 'MCC-DAQ')
         self.config(background='white')
-        self.iconbitmap('assets/uwicon.ico')
+        self.set_icon(self)
 
 
         # Initialize path and filename for data saving
         self.data_path = "C:\\Users\\labuser\\Desktop\\MCC-DAQ"
         self.filename = "MCC-DAQ Data"
 
+        # Initialize format of data file. See DataHandler.formats for options.
+        self.file_format = ".xlsx"
+
+        # Initialize file rotation. Largest size of data file in MB and longest time it covers in seconds, or None for no
+        # limit. Excel files with too many rows for a sheet are split across sheets if enabled, otherwise across files.
+        self.max_file_size = None
+        self.max_file_duration = None
+        self.split_sheets = True
+
 
         # Create menu bar
         menubar = Menu(self)
@@ -86,6 +165,12 @@ class App(Tk):
         pumpmenu.add_command(label="Pump Flowrates", command=self.open_pump_control)
         menubar.add_cascade(label="Pump Control", menu=pumpmenu)
 
+        diagnosticsmenu = Menu(menubar, tearoff=0)
+        diagnosticsmenu.add_command(label="Timings", command=self.open_timings_window)
+        diagnosticsmenu.add_command(label="Profile Updates", command=self.start_profile)
+        diagnosticsmenu.add_command(label="Restart Board Reads", command=self.restart_acquisition)
+        menubar.add_cascade(label="Diagnostics", menu=diagnosticsmenu)
+
         # Add menu to main frame
         self.config(menu=menubar)
 
@@ -96,26 +181,121 @@ class App(Tk):
         # Conductivity channels to read
         self.conductivity_channels = [2, 3]
 
-        # Pump VDAC channels to control and calibration values.
-        # Each VDAC channel requires calibration values.
-        # Calibration is a linear equation with first value in tuple being slope, and second is y-intercept.
-        # Values are mL/min for flow rate and volts for voltage.
-        # See attached pump calibration spreadsheet for details.
+        # Pump VDAC channels to control and calibration of each, converting flowrate in mL/min to voltage.
+        # Each VDAC channel requires a calibration, fitted to a sheet of the attached pump calibration spreadsheet.
+        # Entries are of the form: {channel: (path, sheet, flowrate column, voltage column, kind)}. See Calibration.kinds.
         self.pump_VDAC_channels = [1]
+        self.pump_calibration_sheets = {1: ("calibrations/Pump Calibration.xlsx", "Pump 1 Calibration",
+                                            "Rate (mL/min)", "Pump Voltage Input (V)", 'linear')}
+
+        # Calibration used if a channel's spreadsheet can't be loaded.
+        # Calibration is a linear equation with first value in tuple being slope, and second is y-intercept.
         self.pump_calibration = {1: (0.0492921, 2.4081398)}
 
+        # Calibration of conductivity channels. Voltage is converted to mA across the resistor, then to mS with a linear
+        # equation of slope and y-intercept.
+        self.conductivity_calibration = {'resistor': 220, 'slope': 12.64168, 'intercept': -49.99568}
+
+
+        # ADC data rate of thermocouple channels in Hz. Lower rates are less noisy but slower to read.
+        self.thermocouple_data_rate = 60
+
+        # Conductivity voltages are averaged over a number of samples scanned at a rate in Hz.
+        # Each read takes analog_scan_samples / analog_scan_rate seconds, so keep this below conductivity sample time.
+        self.analog_scan_samples = 5
+        self.analog_scan_rate = 20
+
+        # Compiles calibrations of each channel so all of a group's channels are converted in one call.
+        # Resistor and calibration equation of conductivity channels combine into one linear equation from volts to mS.
+        conductivity_slope = self.conductivity_calibration['slope'] * 1000 / self.conductivity_calibration['resistor']
+        self.conductivity_calibrations = CalibrationSet([Calibration('linear', (conductivity_slope, self.conductivity_calibration['intercept']))
+                                                         for _ in self.conductivity_channels])
+        # Pump calibrations are loaded from a cache unless their spreadsheets changed since the last launch
+        with Timings.span('App.load_calibrations'):
+            self.calibration_cache = CalibrationCache("./MCC-DAQ backup/calibration cache.bin")
+            self.pump_calibrations = CalibrationSet([self.load_pump_calibration(x) for x in self.pump_VDAC_channels])
+            try:
+                self.calibration_cache.save()
+            except OSError as e:
+                print("Calibration cache could not be saved: " + repr(e))
+
+        # Loads board settings saved by the last launch, so they aren't read back again
+        board_settings_loaded = Controller.load_board_state(self.thermocouple_channels + self.conductivity_channels)
 
         # Configure channels to read thermocouples
-        Controller.initialize_thermocouple_read(self.thermocouple_channels)
+        Controller.initialize_thermocouple_read(self.thermocouple_channels, rate=self.thermocouple_data_rate)
 
         # Configure channels to read voltage from conductivity channels
         Controller.initialize_analog_read(self.conductivity_channels)
 
-
-        # Initializes empty lists for temperature, conductivity, and flowrate plot values to be saved to
-        self.temperature = [[] for _ in self.thermocouple_channels]
-        self.conductivity = [[] for _ in self.conductivity_channels]
-        self.flowrates = [[] for _ in self.pump_VDAC_channels]
+        # Reports time spent configuring board. Settings already set on the board aren't sent again.
+        print(f"Configured board in {Controller.configuration_time * 1000:.0f} ms: {Controller.configuration_sent} settings sent, "
+              f"{Controller.configuration_skipped} already set, {board_settings_loaded} loaded from last launch")
+        try:
+            Controller.save_board_state()
+        except OSError as e:
+            print("Board state could not be saved: " + repr(e))
+
+        # Reads thermocouple channels using t_in_scan. Set to False to read each channel with t_in instead.
+        self.thermocouple_scan_enabled = True
+
+        # Reads conductivity channels using a hardware-timed scan. Set to False to poll each channel instead.
+        self.analog_scan_enabled = True
+
+        # Starts reading board on its own thread. Each group's samples are rows of the form: (time, values...)
+        self.acquisition = Acquisition({'thermocouple': (self.read_thermocouples, len(self.thermocouple_channels),
+                                                         self.group_sample_times['thermocouple']),
+                                        'conductivity': (self.read_conductivity, len(self.conductivity_channels),
+                                                         self.group_sample_times['conductivity'])})
+        self.acquisition.start()
+
+        # Initializes position of last sample read from each acquisition buffer
+        self.acquisition_positions = {x: 0 for x in self.acquisition.buffers}
+
+        # Initializes errors of groups that stopped reading, as last shown on status bar
+        self.acquisition_errors = {}
+
+
+        # Initializes column names for temperature, conductivity, and flowrate data. Also used as headers for data files.
+        self.temperature_columns = ['Channel ' + str(x) + ' (°C)' for x in self.thermocouple_channels]
+        self.conductivity_columns = ['Channel ' + str(x) + ' (mS)' for x in self.conductivity_channels]
+        self.flowrate_columns = ['VDAC Channel ' + str(x) + ' (mL/min)' for x in self.pump_VDAC_channels]
+
+        # Initializes store of each group for time of each sample and its values. Each group has its own sample times.
+        # Pump flowrates are stored with conductivity samples.
+        self.samples = {'thermocouple': SampleStore(self.temperature_columns),
+                        'conductivity': SampleStore(self.conductivity_columns + self.flowrate_columns)}
+
+        # Initializes session file path of each group
+        self.session_paths = {x: "./MCC-DAQ backup/session " + x + ".mcds" for x in self.samples}
+
+        # Recovers session files left by a previous run that did not close properly
+        for path in self.session_paths.values():
+            if os.path.exists(path):
+                print(self.recover_session(path))
+
+        # Opens session file of each group that every sample is saved to, so data survives a crash.
+        # Each chunk holds about a minute of samples, so at most a minute of data is lost.
+        self.sessions = {}
+        for group in self.samples:
+            try:
+                self.sessions[group] = SessionFile(self.session_paths[group], self.samples[group].columns,
+                                                   metadata={'group': group,
+                                                             'thermocouple_channels': self.thermocouple_channels,
+                                                             'conductivity_channels': self.conductivity_channels,
+                                                             'pump_VDAC_channels': self.pump_VDAC_channels,
+                                                             'pump_calibration': {x: y.to_dict() for x, y in zip(self.pump_VDAC_channels, self.pump_calibrations.calibrations)},
+                                                             'conductivity_calibration': self.conductivity_calibration,
+                                                             'sample_time': self.group_sample_times[group]},
+                                                   chunk_rows=max(int(60000 // self.group_sample_times[group]), 1))
+
+            # If any error occurs, run without a session file for group
+            except Exception as e:
+                print(e)
+                self.sessions[group] = None
+
+        # Initialize time in seconds from launch to first sample, set by main_update()
+        self.time_to_first_sample = None
 
         # Initialize empty dict of zeroes for current pump flowrates
         self.pump_flowrates = {x: 0 for x in self.pump_VDAC_channels}
@@ -125,20 +305,14 @@ class App(Tk):
         self.main_plot_frame = Frame(self)
         self.main_plot_frame.pack(padx=10)
 
-        # Create thermocouple plot
-        self.plot_frame = Frame(self.main_plot_frame)
-        self.plot_frame.pack(side=LEFT)
-        self.plot = Plot(self.plot_frame, "Channel Temperature Data", "Time (s)", "Temperature (°C)", figure_size=(4, 6))
-
-        # Create conductivity plot
-        self.conductivity_plot_frame = Frame(self.main_plot_frame)
-        self.conductivity_plot_frame.pack(side=LEFT)
-        self.conductivity_plot = Plot(self.conductivity_plot_frame, "Channel Conductivity Data", "Time (s)", "Conductivity (mS)", figure_size=(4, 6), buffer=6)
-
-        # Create pump plot
-        self.pump_plot_frame = Frame(self.main_plot_frame)
-        self.pump_plot_frame.pack(side=LEFT)
-        self.pump_plot = Plot(self.pump_plot_frame, "Pump Flowrate Data", "Time (s)", "Flowrate (mL/min)", figure_size=(4, 6), buffer=6)
+        # Plots are made by create_plots() once the main loop starts, so the window shows and the board starts reading
+        # before matplotlib is loaded. Shows a placeholder until then.
+        self.plot = None
+        self.conductivity_plot = None
+        self.pump_plot = None
+        self.plot_loading_label = Label(self.main_plot_frame, text="Loading plots...", padx=100, pady=100)
+        self.plot_loading_label.pack()
+        self.after_idle(self.create_plots)
 
 
         # Create recording label on bottom
@@ -146,9 +320,22 @@ class App(Tk):
         self.recording_label.pack(side=BOTTOM, pady=(5, 0), fill=X)
 
 
-        # Initialize variables for recording
+        # Initialize variables for profiling updates. See start_profile().
+        self.profile_ticks = 100
+        self.profile_ticks_left = 0
+        self.profiler = None
+        self.profile_tracemalloc_started = False
+
+
+        # Initialize variables for recording. Each group is recorded to its own journal.
         self.recording_in_progress = False
         self.recording_time_start = 0
+        self.recording_index_start = {}
+        self.recorders = {}
+
+        # Starts thread for exporting data files
+        self.export_worker = ExportWorker()
+        self.export_worker.start()
 
 
     def open_data_path(self):
@@ -162,7 +349,7 @@ class App(Tk):
         # Create a Toplevel window
         data_window = Toplevel(self, background='white')
         data_window.geometry('+500+250')
-        data_window.iconbitmap('assets/uwicon.ico')
+        self.set_icon(data_window)
         data_window.resizable(False, False)
 
         # Label for data processing
@@ -187,24 +374,72 @@ class App(Tk):
         filename_entry.insert(END, self.filename)
         filename_entry.pack(padx=10, pady=(0, 10))
 
+        # Label for file format
+        format_label = Label(data_window, text='File Format', background='white')
+        format_label.pack(padx=10, pady=(10, 2))
+
+        # Dropdown for file format. Options are shown as "Name (.extension)".
+        format_options = {DataHandler.formats[x][0] + ' (' + x + ')': x for x in DataHandler.formats}
+        format_variable = StringVar(data_window, DataHandler.formats[self.file_format][0] + ' (' + self.file_format + ')')
+        format_menu = OptionMenu(data_window, format_variable, *format_options)
+        format_menu.config(width=34)
+        format_menu.pack(padx=10, pady=(0, 10))
+
+        # Label for file rotation
+        rotation_label = Label(data_window, text='Start New Data File After\n(Leave blank for no limit)', background='white')
+        rotation_label.pack(padx=10, pady=(10, 2))
+
+        # Frame for file rotation entries
+        rotation_frame = Frame(data_window, background='white')
+        rotation_frame.pack(padx=10, pady=(0, 10))
+
+        # Entry for max file size in MB
+        rotation_validation = (data_window.register(self.validate_number_range), 1000000, 0, "%P")
+        size_entry = Entry(rotation_frame, validate='all', width=10, validatecommand=rotation_validation)
+        if self.max_file_size:
+            size_entry.insert(END, f'{self.max_file_size:g}')
+        size_entry.grid(row=0, column=0)
+        Label(rotation_frame, text='MB', background='white').grid(row=0, column=1, padx=(2, 10))
+
+        # Entry for max file duration in hours
+        duration_entry = Entry(rotation_frame, validate='all', width=10, validatecommand=rotation_validation)
+        if self.max_file_duration:
+            duration_entry.insert(END, f'{self.max_file_duration / 3600:g}')
+        duration_entry.grid(row=0, column=2)
+        Label(rotation_frame, text='hours', background='white').grid(row=0, column=3, padx=(2, 0))
+
+        # Checkbox for splitting Excel files across sheets
+        split_sheets_variable = BooleanVar(data_window, self.split_sheets)
+        split_sheets_check = Checkbutton(data_window, text='Split Excel files across sheets', variable=split_sheets_variable,
+                                         background='white')
+        split_sheets_check.pack(padx=10, pady=(0, 10))
+
+        # Closes window with entered settings
+        apply = lambda: self.close_data_window(data_window, data_path_entry.get(), filename_entry.get(),
+                                               format_options[format_variable.get()], size_entry.get(),
+                                               duration_entry.get(), split_sheets_variable.get())
+
         # Button for applying changes
-        apply_button = Button(data_window, text='Apply', command=lambda: self.close_data_window(data_window,
-                                                                                                data_path_entry.get(),
-                                                                                                filename_entry.get()))
+        apply_button = Button(data_window, text='Apply', command=apply)
         apply_button.config(width=20)
         apply_button.pack(padx=10, pady=10)
 
         # Binds enter key to close window
-        data_window.bind('<Return>', lambda e: self.close_data_window(data_window, data_path_entry.get(), filename_entry.get()))
+        data_window.bind('<Return>', lambda e: apply())
 
 
-    def close_data_window(self, window, path, filename):
+    def close_data_window(self, window, path, filename, file_format=".xlsx", max_file_size="", max_file_duration="",
+                          split_sheets=True):
         """
         Closes data path window.
 
         :param window: Window to close
         :param path: Path to save file to
         :param filename: Name of data file
+        :param file_format: File extension of data file format
+        :param max_file_size: Entered size in MB to start a new file after, blank for no limit
+        :param max_file_duration: Entered duration in hours to start a new file after, blank for no limit
+        :param split_sheets: Whether Excel files are split across sheets
         """
 
         # Cleans path and filename
@@ -214,6 +449,12 @@ class App(Tk):
         # Updates filename and path
         self.data_path = cleaned_path
         self.filename = cleaned_filename
+        self.file_format = file_format
+
+        # Updates file rotation. Zero is treated as no limit.
+        self.max_file_size = float(max_file_size) if max_file_size and float(max_file_size) else None
+        self.max_file_duration = float(max_file_duration) * 3600 if max_file_duration and float(max_file_duration) else None
+        self.split_sheets = split_sheets
 
         # Closes popup
         window.destroy()
@@ -224,14 +465,23 @@ class App(Tk):
         Method to initiate App data recording.
         """
 
-        # If recording isn't already in progress
-        if not self.recording_in_progress:
+        # If recording isn't already in progress and a sample has been read
+        if not self.recording_in_progress and any(len(x) > 0 for x in self.samples.values()):
 
             # Mark that recording is in progress
             self.recording_in_progress = True
 
-            # Get recording time start
-            self.recording_time_start = self.runtime[-1]
+            # Get recording time start from latest sample, and index of first sample of each group from that second
+            self.recording_time_start = max(x.time[-1] for x in self.samples.values() if len(x) > 0)
+            self.recording_index_start = {x: int(np.searchsorted(self.samples[x].time, int(self.recording_time_start)))
+                                          for x in self.samples}
+
+            # Opens CSV journal of each group that samples are appended to while recording
+            self.recorders = {x: Recorder(self.data_path, self.filename + " " + x, ['Runtime (s)'] + self.samples[x].columns)
+                              for x in self.samples}
+
+            # Writes samples from start of recording
+            self.record_samples()
 
             # Updates recording label
             self.recording_label.config(text="Recording Started at: " + str(int(self.recording_time_start)) + "s")
@@ -248,8 +498,86 @@ class App(Tk):
             # Set recording to false
             self.recording_in_progress = False
 
+            # Writes samples read since last update and closes journals
+            self.record_samples()
+            for recorder in self.recorders.values():
+                recorder.close()
+
+            # Every sample of every group is kept, leaving other groups' values empty in its row
+            journal_paths = [x.path for x in self.recorders.values()]
+
+            # Outputs recorded data to data file on export thread. Journals are read and joined there too, as they can be large.
+            self.export_worker.submit(lambda: DataHandler.align([pd.read_csv(x, encoding='utf-8-sig') for x in journal_paths]),
+                                      self.data_path, self.filename, file_format=self.file_format, max_size=self.max_file_size,
+                                      max_duration=self.max_file_duration, split_sheets=self.split_sheets)
+
             # Configure label
-            self.recording_label.config(text='Recording Stopped at: ' + str(int(self.runtime[-1])) + "s")
+            self.recording_label.config(text='Recording Stopped at: ' + str(int(max(x.time[-1] for x in self.samples.values() if len(x) > 0))) + "s")
+
+
+    @staticmethod
+    def recover_session(path):
+        """
+        Recovers session file left by a previous run and archives it, so the next session doesn't overwrite it.
+        Files that can't be recovered, i.e. with a torn header, are archived as damaged so they don't block startup.
+
+        :param path: Path of session file
+        :return: Message describing result
+        """
+        try:
+            samples = SessionFile.recover(path)
+            return "Recovered " + str(samples) + " samples from previous session: " + App.archive_session(path)
+
+        except (OSError, ValueError) as e:
+            return "Could not recover previous session (" + repr(e) + "). Moved to: " + App.archive_session(path)
+
+
+    @staticmethod
+    def archive_session(path):
+        """
+        Renames session file after the time its session started, so the next session doesn't overwrite it.
+
+        Files whose header can't be read are named after the time they were last written and marked as damaged.
+
+        :param path: Path of session file
+        :return: New path of session file
+        """
+        try:
+            header, chunks = SessionFile.read(path)
+            del chunks
+            start_time = header['start_time']
+            group = header['metadata'].get('group')
+            damaged = False
+        except (OSError, ValueError):
+            start_time = os.path.getmtime(path)
+            group = os.path.splitext(os.path.basename(path))[0].replace("session", "", 1).strip() or None
+            damaged = True
+
+        # Gets new path in same directory, keeping name of channel group
+        archive_name = time.strftime("session %Y-%m-%d %H-%M-%S", time.localtime(start_time))
+        if group:
+            archive_name += " " + group
+        if damaged:
+            archive_name += " damaged"
+        archive_path = os.path.join(os.path.dirname(path), archive_name + ".mcds")
+
+        os.replace(path, archive_path)
+
+        return archive_path
+
+
+    def record_samples(self):
+        """
+        Appends samples stored since last call to recording journal of each group.
+        """
+
+        for group, recorder in self.recorders.items():
+
+            # Gets samples not yet recorded. Runtime is relative to recording start.
+            start = self.recording_index_start[group] + recorder.count
+            runtime = self.samples[group].time[start:] - int(self.recording_time_start)
+
+            recorder.write(runtime, self.samples[group].rows(start))
 
 
     def open_pump_control(self):
@@ -261,7 +589,7 @@ class App(Tk):
         # Create a Toplevel window
         pump_window = Toplevel(self, background='white')
         pump_window.geometry('+500+250')
-        pump_window.iconbitmap('assets/uwicon.ico')
+        self.set_icon(pump_window)
         pump_window.resizable(False, False)
 
         # Create a frame to store entry boxes and labels in
@@ -310,27 +638,267 @@ class App(Tk):
         :param flowrates: Dictionary of flowrates of the form: {channel_number: flowrate_value, ...}
         """
 
+        # Add updates flowrate values to main dictionary for adding to plot
+        self.pump_flowrates.update(flowrates)
+
+        # Converts mL/min to V of every pump at once from calibrations
+        voltages = self.pump_calibrations.apply([[self.pump_flowrates[x] for x in self.pump_VDAC_channels]])[0]
+
         # For every channel f in dict flowrates
         for f in flowrates:
 
-            # Add updates flowrate value to main dictionary for adding to plot
-            self.pump_flowrates[f] = flowrates[f]
-
             # Sets to 0 voltage if flowrate is 0
             if flowrates[f] == 0:
-                # Turns off pump f
-                Controller.analog_out(f, 0)
+                # Turns off pump f. Waits for any board read in progress.
+                with self.acquisition.lock:
+                    Controller.analog_out(f, 0)
 
             # If not zero, sets flowrate to amount
             else:
 
-                # Sets pump on channel f to desired flowrate. Converts mL/min to V from calibration dict.
-                Controller.analog_out(f, flowrates[f] * self.pump_calibration[f][0] + self.pump_calibration[f][1])
+                # Sets pump on channel f to desired flowrate
+                with self.acquisition.lock:
+                    Controller.analog_out(f, voltages[self.pump_VDAC_channels.index(f)])
 
         # Closes popup
         window.destroy()
 
 
+    def create_plots(self):
+        """
+        Creates temperature, conductivity, and pump plots in place of the loading placeholder.
+        """
+        # Draws window with placeholder first, as loading matplotlib takes a moment
+        self.update_idletasks()
+
+        with Timings.span('App.create_plots'):
+
+            # Create thermocouple plot
+            self.plot_frame = Frame(self.main_plot_frame)
+            self.plot_frame.pack(side=LEFT)
+            self.plot = Plot(self.plot_frame, "Channel Temperature Data", "Time (s)", "Temperature (°C)", figure_size=(4, 6), blit=True)
+
+            # Create conductivity plot
+            self.conductivity_plot_frame = Frame(self.main_plot_frame)
+            self.conductivity_plot_frame.pack(side=LEFT)
+            self.conductivity_plot = Plot(self.conductivity_plot_frame, "Channel Conductivity Data", "Time (s)", "Conductivity (mS)", figure_size=(4, 6), buffer=6, blit=True)
+
+            # Create pump plot
+            self.pump_plot_frame = Frame(self.main_plot_frame)
+            self.pump_plot_frame.pack(side=LEFT)
+            self.pump_plot = Plot(self.pump_plot_frame, "Pump Flowrate Data", "Time (s)", "Flowrate (mL/min)", figure_size=(4, 6), buffer=6, blit=True)
+
+        self.plot_loading_label.destroy()
+
+
+    def load_pump_calibration(self, channel: int):
+        """
+        Fits calibration of a pump VDAC channel to its sheet in self.pump_calibration_sheets.
+        Falls back to linear calibration in self.pump_calibration if the sheet can't be loaded.
+
+        :param channel: Pump VDAC channel
+        :return: Calibration converting flowrate in mL/min to voltage
+        """
+        try:
+            path, sheet_name, x_column, y_column, kind = self.pump_calibration_sheets[channel]
+            return self.calibration_cache.from_excel(path, sheet_name, x_column, y_column, kind)
+
+        # If any error occurs, uses fallback calibration
+        except Exception as e:
+            print("Using fallback calibration for VDAC channel " + str(channel) + ": " + repr(e))
+            return Calibration('linear', self.pump_calibration[channel])
+
+
+    def open_timings_window(self):
+        """
+        Opens window showing how long each stage of the app takes, from Timings. Refreshes every second.
+        """
+
+        # Create a Toplevel window
+        timings_window = Toplevel(self, background='white')
+        timings_window.geometry('+500+250')
+        self.set_icon(timings_window)
+        timings_window.title('Timings')
+
+        # Label for table of timings
+        timings_label = Label(timings_window, text='', background='white', font=('Courier', 9), justify=LEFT)
+        timings_label.pack(padx=10, pady=10)
+
+        # Frame for buttons
+        button_frame = Frame(timings_window, background='white')
+        button_frame.pack(padx=10, pady=(0, 10))
+
+        # Button for saving timings
+        save_button = Button(button_frame, text='Save to CSV', command=self.save_timings)
+        save_button.config(width=20)
+        save_button.grid(row=0, column=0, padx=5)
+
+        # Button for clearing timings
+        reset_button = Button(button_frame, text='Reset', command=Timings.reset)
+        reset_button.config(width=20)
+        reset_button.grid(row=0, column=1, padx=5)
+
+        self.update_timings_window(timings_window, timings_label)
+
+
+    def update_timings_window(self, window, label):
+        """
+        Updates table of timings every second until window is closed.
+
+        :param window: Timings window
+        :param label: Label showing table of timings
+        """
+
+        # Stops updating once window is closed
+        if not window.winfo_exists():
+            return
+
+        statistics = Timings.statistics()
+        if len(statistics):
+            label.config(text=statistics.to_string(index=False, float_format='{:.2f}'.format))
+        else:
+            label.config(text='No timings yet')
+
+        window.after(1000, lambda: self.update_timings_window(window, label))
+
+
+    def restart_acquisition(self):
+        """
+        Restarts board reads of groups that stopped on an error, i.e. after reconnecting a thermocouple.
+        """
+        groups = self.acquisition.restart()
+        if groups:
+            self.recording_label.config(text='Board reads restarted: ' + ', '.join(groups))
+        else:
+            self.recording_label.config(text='No board reads are stopped.')
+
+
+    def start_profile(self):
+        """
+        Profiles the next updates with cProfile and tracks memory allocated during them with tracemalloc, without
+        stopping acquisition or recording. Only the GUI thread is profiled, as cProfile profiles one thread.
+        Results are saved to the data directory by finish_profile().
+        """
+
+        # Only one profile runs at a time
+        if self.profiler is not None:
+            return
+
+        # Asks for number of updates to profile
+        ticks = simpledialog.askinteger("Profile Updates", "Number of updates to profile:", parent=self,
+                                        initialvalue=self.profile_ticks, minvalue=1)
+        if ticks is None:
+            return
+        self.profile_ticks = ticks
+        self.profile_ticks_left = ticks
+
+        # Starts tracking memory allocations if not already tracking. Frames are kept so allocations can be traced back.
+        self.profile_tracemalloc_started = not tracemalloc.is_tracing()
+        if self.profile_tracemalloc_started:
+            tracemalloc.start(25)
+
+        # Profiler is enabled around main_update() in main_thread()
+        self.profiler = cProfile.Profile()
+
+        self.recording_label.config(text='Profiling next ' + str(ticks) + ' updates...')
+
+
+    def finish_profile(self):
+        """
+        Saves profile of updates and memory still allocated from them to the data directory.
+        Saves a .prof file for tools such as snakeviz, a .tracemalloc snapshot, and a text summary of each.
+        """
+
+        # Takes memory snapshot, ignoring memory used by tracemalloc itself
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        if self.profile_tracemalloc_started:
+            tracemalloc.stop()
+
+        profiler = self.profiler
+        self.profiler = None
+
+        # Gets start of paths named after current time
+        name = time.strftime("%Y-%m-%d %H-%M-%S")
+
+        # Try to save profile to data directory
+        try:
+            if not os.path.exists(self.data_path):
+                os.makedirs(self.data_path)
+            path = self.save_profile(profiler, snapshot, os.path.join(self.data_path, "MCC-DAQ Profile " + name))
+
+        # If any error occurs, save profile to project directory instead
+        except Exception as e:
+            print(e)
+            path = self.save_profile(profiler, snapshot, "./MCC-DAQ backup/temp profile")
+
+        print('Profile saved to: ' + path)
+        self.recording_label.config(text='Profile saved to: ' + path)
+
+
+    @staticmethod
+    def save_profile(profiler, snapshot, path):
+        """
+        Saves profile and memory snapshot.
+
+        :param profiler: cProfile.Profile of updates
+        :param snapshot: tracemalloc.Snapshot taken after updates
+        :param path: Path without extension. Files are saved with .prof, .txt, .tracemalloc and " memory.txt" added.
+        :return: Path of text summary of profile
+        """
+
+        # Saves profile and summary of functions that took the most time
+        profiler.dump_stats(path + ".prof")
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(50)
+        with open(path + ".txt", 'w') as file:
+            file.write(summary.getvalue())
+
+        # Saves snapshot and summary of lines with the most memory still allocated
+        snapshot.dump(path + ".tracemalloc")
+        with open(path + " memory.txt", 'w') as file:
+            for statistic in snapshot.statistics('lineno')[:50]:
+                file.write(str(statistic) + "\n")
+
+        return path + ".txt"
+
+
+    def save_timings(self):
+        """
+        Saves timings of each stage to a CSV file in the data directory.
+        """
+
+        # Gets path named after current time
+        path = os.path.join(self.data_path, time.strftime("MCC-DAQ Timings %Y-%m-%d %H-%M-%S.csv"))
+
+        # Try to save timings to data directory
+        try:
+            if not os.path.exists(self.data_path):
+                os.makedirs(self.data_path)
+            Timings.dump(path)
+
+        # If any error occurs, save timings to project directory instead
+        except Exception as e:
+            print(e)
+            path = "./MCC-DAQ backup/temp timings.csv"
+            Timings.dump(path)
+
+        print('Timings saved to: ' + path)
+        self.recording_label.config(text='Timings saved to: ' + path)
+
+
+    @staticmethod
+    def set_icon(window):
+        """
+        Sets icon of a window. Icon is a Windows .ico file, so it is skipped where Tk can't load it.
+
+        :param window: Window to set icon of
+        """
+        try:
+            window.iconbitmap('assets/uwicon.ico')
+        except TclError:
+            pass
+
+
     @staticmethod
     def validate_number_range(maximum, minimum, value):
         """
@@ -357,14 +925,52 @@ class App(Tk):
 
     def on_closing(self):
         """
-        Method that handles the application being closed. Turns all pumps off.
+        Method that handles the application being closed. Stops reading board, turns all pumps off, and ends recording.
+        Pumps are turned off and the application is closed even if a step before them fails.
         """
-        for c in self.pump_VDAC_channels:
-            # Turns off pump on channel c
-            Controller.analog_out(c, 0)
-
-        # Closes application
-        self.destroy()
+        try:
+            try:
+                # Stops acquisition thread
+                self.acquisition.stop()
+
+            finally:
+                # Turns pumps off before recording is saved, as exports and closing session files can take minutes
+                failed_pumps = []
+                for c in self.pump_VDAC_channels:
+                    # Turns off pump on channel c. If it fails, the other pumps are still turned off.
+                    try:
+                        Controller.analog_out(c, 0)
+                    except Exception as e:
+                        failed_pumps.append("VDAC Channel " + str(c) + ": " + repr(e))
+
+                # Shows pumps that may still be running, as pythonw has no terminal to print to
+                if failed_pumps:
+                    messagebox.showerror("MCC-DAQ", "Pumps could not be turned off. Turn them off by hand.\n\n" + "\n".join(failed_pumps))
+
+            # Reads samples acquired since the last update, so end_recording() records them and they are saved to session files
+            self.read_new_samples()
+
+            # Outputs timing of board reads and updates
+            for group, scheduler in self.acquisition.schedulers.items():
+                print("Board read timing (" + group + "):", scheduler.statistics())
+            print("Update timing:", self.scheduler.statistics())
+
+            # Ends recording so recorded data is saved
+            self.end_recording()
+
+            # Waits for exports in progress to finish
+            print("Waiting for exports to finish...")
+            self.export_worker.stop()
+
+            # Closes and keeps session files
+            for group, session in self.sessions.items():
+                if session is not None:
+                    session.close()
+                    print("Session saved to: " + self.archive_session(self.session_paths[group]))
+
+        finally:
+            # Closes application
+            self.destroy()
 
 
     def main_thread(self):
@@ -372,160 +978,291 @@ class App(Tk):
         Function that regulates app to ensure consistent refresh time
         """
 
-        # Gets start time of main_thread() for making data readout consistent
-        update_runtime_start = time.time()
-
-        # Adjust data start time to ensure data starts at 0.0s. Only runs first time main_thread() is run
-        if not self.start_time_adjusted:
-            self.start_time += time.time() - self.start_time
-            self.start_time_adjusted = True
-
-        #Gets time and rounds - adds to runtime array - data will be collected at self.refresh_rate
-        relative_time = np.round(time.time() - self.start_time, 1)
-        self.runtime.append(relative_time)
-
-        print(time.time() - self.start_time)
-
-        # Initializes value for time drift correction
-        offset_time = (time.time() - self.start_time) * 1000
-        offset_time_int = round(offset_time, -2)
-        delta_time = int(offset_time - offset_time_int)
+        # Starts schedule the first time main_thread() is run
+        if self.scheduler.start_ns is None:
+            self.scheduler.start()
 
+        # Records how late update is
+        self.scheduler.tick()
 
         # Starts timer to monitor main_update() runtime
-        runtime = time.time()
-
-        # Main update function where runtime code goes
-        self.main_update()
+        runtime = time.perf_counter()
+
+        # Main update function where runtime code goes. Profiled if a profile was started.
+        if self.profiler is not None:
+            self.profiler.enable()
+            self.main_update()
+            self.profiler.disable()
+            self.profile_ticks_left -= 1
+        else:
+            self.main_update()
 
         # Ends timer to monitor main_update() runtime and converts to (ms)
-        runtime = int((time.time() - runtime) * 1000)
+        runtime = (time.perf_counter() - runtime) * 1000
+        Timings.add('App.main_update', runtime)
+
+        # Saves profile once enough updates were profiled
+        if self.profiler is not None and self.profile_ticks_left <= 0:
+            self.finish_profile()
 
         # If runtime of main_update() excess refresh time, output error to terminal
         if runtime > self.refresh_time:
             print("\n\033[0;31mWARNING: Runtime of main thread exceeded refresh rate.\nRefresh rate: "
                   + str(self.refresh_time) + " ms \nRuntime: " + str(round(runtime, 1)) + " ms\n\033[0;30m")
 
+        # Moves to next deadline. after() only takes whole ms, so delay is rounded down.
+        self.scheduler.advance()
+        self.after(int(self.scheduler.next_delay() * 1000), self.main_thread)
+
 
-        # Gets time taken to run function and outputs to console
-        update_runtime_finish = (time.time() - update_runtime_start) * 1000
-        # print(update_runtime_finish)
+    def read_thermocouples(self):
+        """
+        Reads thermocouple channels from the board. Runs on the acquisition thread, so it must not touch any widgets.
+
+        :return: List of temperatures
+        """
+        # Gets temperatures with one scan per contiguous run of channels
+        if self.thermocouple_scan_enabled:
+            try:
+                current_temperatures = Controller.thermocouple_scan_read(self.thermocouple_channels)
 
-        # Gets time in ms to reduce time till refresh, accounting for time took to run code
-        adjusted_time = self.refresh_time - update_runtime_finish
-        adjusted_time_floored = int(round(adjusted_time, 0))
+            # If board rejects scan, switch to reading each channel for the rest of the session
+            except ULError as e:
 
-        # Applies time offset
-        if delta_time > 1:
-            adjusted_time_floored -= delta_time
+                # Open or out of range thermocouples are errors with the thermocouple, not the scan
+                if e.errorcode in (ErrorCode.OUTOFRANGE, ErrorCode.OPENCONNECTION):
+                    raise
 
-        # End of function command to repeat,
-        self.after(adjusted_time_floored, self.main_thread)
+                print(e.message)
+                print("Thermocouple scan failed. Falling back to single channel thermocouple reads.")
+                self.thermocouple_scan_enabled = False
 
+        # Gets temperatures by reading each channel
+        if not self.thermocouple_scan_enabled:
+            current_temperatures = Controller.thermocouple_instantaneous_read(self.thermocouple_channels)
 
-    def main_update(self):
+        return list(current_temperatures)
+
+
+    def read_conductivity(self):
         """
-        Main runtime method that contains all code to execute during app runtime.
+        Reads conductivity channels from the board. Runs on the acquisition thread, so it must not touch any widgets.
+
+        :return: List of conductivity voltages
         """
-        # Gets temperatures
-        current_temperatures_not_rounded = Controller.thermocouple_instantaneous_read(self.thermocouple_channels)
+        # Gets voltage from conductivity channels with a hardware-timed scan
+        if self.analog_scan_enabled:
+            try:
+                current_conductivity_V = Controller.analog_scan_read(self.conductivity_channels,
+                                                                     samples=self.analog_scan_samples,
+                                                                     rate=self.analog_scan_rate)
 
-        # Rounds temperatures
-        current_temperatures = np.round(current_temperatures_not_rounded, 1)
+            # If board rejects scan, switch to polling each channel for the rest of the session
+            except ULError as e:
+                print(e.message)
+                print("Analog scan failed. Falling back to polled analog reads.")
+                self.analog_scan_enabled = False
 
+        # Gets voltage from conductivity channels by polling each channel
+        if not self.analog_scan_enabled:
+            current_conductivity_V = Controller.analog_read(self.conductivity_channels)
 
-        # Gets voltage from conductivity channels
-        current_conductivity_V = Controller.analog_read(self.conductivity_channels)
+        return list(current_conductivity_V)
 
-        # Converts voltages to mA with the basis of a 220 Ohm resistor
-        current_conductivity_mA = [x / 220 * 1000 for x in current_conductivity_V]
 
-        # Uses calibration equation to convert mA to mS and rounds to 1 decimal place
-        current_conductivity_mS = [round(12.64168 * x - 49.99568, 1) for x in current_conductivity_mA]
+    def main_update(self):
+        """
+        Main runtime method that contains all code to execute during app runtime.
+        """
+        # Shows groups that stopped reading on an error on status bar, as pythonw has no terminal to print to
+        acquisition_errors = dict(self.acquisition.errors)
+        if acquisition_errors != self.acquisition_errors:
+            for group in acquisition_errors.keys() - self.acquisition_errors.keys():
+                print("\n\033[0;31mERROR: Board reads of " + group + " stopped.\n" + str(acquisition_errors[group]) + "\n\033[0;30m")
+            if acquisition_errors:
+                self.recording_label.config(text='Board reads stopped: ' + '; '.join(group + ': ' + str(e) for group, e in acquisition_errors.items()) +
+                                                 '. Restart with Diagnostics > Restart Board Reads.')
+            self.acquisition_errors = acquisition_errors
+
+        # Shows result of finished exports on status bar
+        for status, message in self.export_worker.get_results():
+            if status == 'error':
+                self.recording_label.config(text='Export failed: ' + message)
+            else:
+                self.recording_label.config(text='Data saved to: ' + message)
 
+        # Nothing to update if no new samples were read
+        if not self.read_new_samples():
+            return
 
-        # Appends temperature data to main array
-        for x in range(len(self.thermocouple_channels)):
-            # Appends current temperatures to a 2D list
-            self.temperature[x].append(current_temperatures[x])
+        # Reports time from launch to first sample
+        if self.time_to_first_sample is None:
+            self.time_to_first_sample = (time.perf_counter_ns() - launch_time_ns) / 1e9
+            Timings.add('App.time_to_first_sample', self.time_to_first_sample * 1000)
+            print(f"Time to first sample: {self.time_to_first_sample:.2f} s")
 
-        # Appends conductivity data to main array
-        for x in range(len(self.conductivity_channels)):
-            # Appends current temperatures to a 2D list
-            self.conductivity[x].append(current_conductivity_mS[x])
+        # If data recording is enabled, appends new samples to recording
+        if self.recording_in_progress:
+            with Timings.span('App.record_samples'):
+                self.record_samples()
 
-        # Appends flowrates to main array
-        for x in range(len(self.pump_VDAC_channels)):
-            # Appends current temperatures to a 2D list
-            self.flowrates[x].append(self.pump_flowrates[self.pump_VDAC_channels[x]])
+        # Plots are made after the first tick, see create_plots()
+        if self.plot is None:
+            return
 
 
         # Formats thermocouple data for plotting - format is a tuple as follows: (x, y, label)
-        data = []
-        for x in range(len(self.thermocouple_channels)):
-            data.append((self.runtime,
-                         self.temperature[x],
-                         "Channel " + str(self.thermocouple_channels[x]) + ": " + str(current_temperatures[x]) + "°C"))
+        temperatures = self.samples['thermocouple']
+        if len(temperatures) > 0:
+            data = []
+            for x in range(len(self.thermocouple_channels)):
+                column = temperatures[self.temperature_columns[x]]
+                data.append((temperatures.time, column,
+                             "Channel " + str(self.thermocouple_channels[x]) + ": " + str(column[-1]) + "°C"))
+            with Timings.span('Plot.update_data ' + self.plot.title):
+                self.plot.update_data(data)
+
+        # Formats conductivity and flowrate data for plotting - format is a tuple as follows: (x, y, label)
+        conductivity = self.samples['conductivity']
+        if len(conductivity) > 0:
+            conductivity_data = []
+            for x in range(len(self.conductivity_channels)):
+                column = conductivity[self.conductivity_columns[x]]
+                conductivity_data.append((conductivity.time, column,
+                                          "Channel " + str(self.conductivity_channels[x]) + ": " + str(column[-1]) + "mS"))
 
-        # Formats thermocouple data for plotting - format is a tuple as follows: (x, y, label)
-        conductivity_data = []
-        for x in range(len(self.conductivity_channels)):
-            conductivity_data.append((self.runtime, self.conductivity[x],
-                                      "Channel " + str(self.conductivity_channels[x]) + ": " + str(current_conductivity_mS[x]) + "mS"))
+            flowrate_data = []
+            for x in range(len(self.pump_VDAC_channels)):
+                flowrate_data.append((conductivity.time, conductivity[self.flowrate_columns[x]],
+                                      "VDAC Channel " + str(self.pump_VDAC_channels[x]) + ": " + str(self.pump_flowrates[self.pump_VDAC_channels[x]]) + "mL/ms"))
 
-        # Formats thermocouple data for plotting - format is a tuple as follows: (x, y, label)
-        flowrate_data = []
-        for x in range(len(self.pump_VDAC_channels)):
-            flowrate_data.append((self.runtime, self.flowrates[x],
-                                  "VDAC Channel " + str(self.pump_VDAC_channels[x]) + ": " + str(self.pump_flowrates[self.pump_VDAC_channels[x]]) + "mL/ms"))
+            with Timings.span('Plot.update_data ' + self.conductivity_plot.title):
+                self.conductivity_plot.update_data(conductivity_data)
+            with Timings.span('Plot.update_data ' + self.pump_plot.title):
+                self.pump_plot.update_data(flowrate_data)
 
+    def read_new_samples(self):
+        """
+        Reads samples acquired since the last call from each group's buffer, calibrates them, and adds them to the
+        group's SampleStore and session file.
 
-        # Updates plots
-        self.plot.update_data(data)
-        self.conductivity_plot.update_data(conductivity_data)
-        self.pump_plot.update_data(flowrate_data)
+        :return: True if any group read new samples
+        """
+        # Initializes flag for whether any group read new samples
+        new_samples = False
 
+        # Gets all samples read from the board since last update for each group
+        for group in self.samples:
+            samples, self.acquisition_positions[group] = self.acquisition.buffers[group].read_since(self.acquisition_positions[group])
 
-        # If data recording is enabled
-        if self.recording_in_progress:
+            # Nothing to add if no new samples were read
+            if len(samples) == 0:
+                continue
+            new_samples = True
 
-            # Gets runtime
-            data_offset = int(self.recording_time_start)
+            # Splits samples into times and values
+            sample_times = samples[:, 0]
+            values = samples[:, 1:]
 
-            # Scales offset to refresh time, so it will correspond to the indices
-            data_offset_scaled = int(data_offset / (self.refresh_time / 1000))
+            with Timings.span('calibration ' + group):
 
-            # Initializes DataFrame
-            df = pd.DataFrame()
+                if group == 'thermocouple':
 
-            # Writes runtime to df DataFrame
-            df['Runtime (s)'] = [x - data_offset for x in self.runtime[data_offset_scaled:]]
+                    # Rounds temperatures
+                    values = np.round(values, 1)
 
-            # Writes thermocouple data to df DataFrame
-            for x in range(len(self.thermocouple_channels)):
-                df['Channel ' + str(self.thermocouple_channels[x]) + ' (°C)'] = self.temperature[x][data_offset_scaled:]
+                elif group == 'conductivity':
 
-            # Writes conductivity data to df Dataframe
-            for x in range(len(self.conductivity_channels)):
-                df['Channel ' + str(self.conductivity_channels[x]) + ' (mS)'] = self.conductivity[x][data_offset_scaled:]
+                    # Converts voltages of all channels to mS with calibrations and rounds to 1 decimal place
+                    conductivity_mS = np.round(self.conductivity_calibrations.apply(values), 1)
 
-            # Writes flowrate data to df DataFrame
-            for x in range(len(self.pump_VDAC_channels)):
-                df['VDAC Channel ' + str(self.pump_VDAC_channels[x]) + ' (mL/min)'] = self.flowrates[x][
-                                                                                data_offset_scaled:]
+                    # Gets current flowrate of each pump for every new sample
+                    flowrates = np.tile([self.pump_flowrates[x] for x in self.pump_VDAC_channels], (len(samples), 1))
+
+                    values = np.hstack((conductivity_mS, flowrates))
+
+            # Appends new samples to store
+            self.samples[group].extend(sample_times, values)
+
+            # Saves new samples to session file
+            if self.sessions[group] is not None:
+                with Timings.span('SessionFile.append ' + group):
+                    self.sessions[group].append(sample_times, values)
+
+        return new_samples
 
-            # Outputs DataFrame to Excel file
-            DataHandler.export(df, self.data_path, self.filename)
 
 
 class Controller:
     """
     Set of functions to interact with MCC control board.
+    Board functions are called on mcculw.ul, or on a SimulatedBoard set with Controller.set_backend().
     """
+
+    # Settings of each channel last read back from or sent to the board, of the form: {(board, channel, BoardInfo): value}
+    board_state = {}
+
+    # Reads back settings not yet cached before sending them. Set to False if ul.get_config() is slow on a board.
+    read_back_config = True
+
+    # File board state of each board is saved to, so the next launch doesn't read back every setting again
+    board_state_path = "./MCC-DAQ backup/board state.json"
+
+    # Setting last sent to each board, of the form: {board: (channel, BoardInfo)}. Read back to check a saved board state.
+    last_sent_config = {}
+
+    # Total time in seconds spent configuring channels, and number of settings sent and skipped as already set
+    configuration_time = 0.0
+    configuration_sent = 0
+    configuration_skipped = 0
+
+    # Estimated time in seconds of a call to each scan function, not including conversions. Used to plan scans.
+    scan_latency = {'t_in_scan': 0.001, 'a_in_scan': 0.003}
+
+    # Data rate in Hz assumed for channels whose data rate isn't known
+    default_data_rate = 60
+
+    # Scan plans of each list of channels, of the form: {(function, channels, board, samples, rate): ScanPlan}
+    scan_plans = {}
+
+    # Uses channel-gain queue on boards that have one. Whether each board has one and the channels loaded in it.
+    use_gain_queue = True
+    gain_queue_support = {}
+    loaded_queues = {}
+
+    # Temperatures t_in_scan returns for open or out of range thermocouples, i.e. -9999, are below absolute zero
+    invalid_temperature_limit = -273.15
+
+    @staticmethod
+    def set_backend(backend):
+        """
+        Sets what board functions are called on.
+
+        :param backend: mcculw.ul, or an object with the same functions and a ULError exception class such as SimulatedBoard
+        """
+        global ul, ULError
+        ul = backend
+        ULError = backend.ULError
+
+        # Cached settings and scan plans belong to the previous backend
+        Controller.board_state.clear()
+        Controller.last_sent_config.clear()
+        Controller.scan_plans.clear()
+        Controller.gain_queue_support.clear()
+        Controller.loaded_queues.clear()
+
+    @staticmethod
+    def is_simulated():
+        """
+        Checks if board functions are called on a SimulatedBoard rather than the MCC driver.
+        """
+        return isinstance(ul, SimulatedBoard)
+
     @staticmethod
     def initialize_thermocouple_read(channel: int | list[int], board_number=0, rate=60, thermocouple_type=TcType.K):
         """
         Initialize desired channels to read thermocouples of a certain type.
+        Only settings that differ from the board's current state are sent, see Controller.configure().
 
         :param channel: Desired channel or channels to read
         :param board_number: Number of board from InstaCal
@@ -533,42 +1270,14 @@ class Controller:
         :param thermocouple_type: Type of thermocouple. Use TcType.X for type X thermocouple.
         """
 
-        # If channel is single value setup single channel
-        if type(channel) is int:
-            # Set channel type to TC (thermocouple)
-            ul.set_config(
-                InfoType.BOARDINFO, board_number, channel, BoardInfo.ADCHANTYPE,
-                AiChanType.TC)
-            # Set thermocouple type to type K
-            ul.set_config(
-                InfoType.BOARDINFO, board_number, channel, BoardInfo.CHANTCTYPE,
-                thermocouple_type)
-            # Set the temperature scale to Celsius
-            ul.set_config(
-                InfoType.BOARDINFO, board_number, channel, BoardInfo.TEMPSCALE,
-                TempScale.CELSIUS)
-            # Set data rate
-            ul.set_config(
-                InfoType.BOARDINFO, board_number, channel, BoardInfo.ADDATARATE, rate)
-
-        # If channel is list setup every channel in list
-        if type(channel) is list:
-            for i in channel:
-                # Set channel type to TC (thermocouple)
-                ul.set_config(
-                    InfoType.BOARDINFO, board_number, i, BoardInfo.ADCHANTYPE,
-                    AiChanType.TC)
-                # Set thermocouple type to type K
-                ul.set_config(
-                    InfoType.BOARDINFO, board_number, i, BoardInfo.CHANTCTYPE,
-                    thermocouple_type)
-                # Set the temperature scale to Celsius
-                ul.set_config(
-                    InfoType.BOARDINFO, board_number, i, BoardInfo.TEMPSCALE,
-                    TempScale.CELSIUS)
-                # Set data rate
-                ul.set_config(
-                    InfoType.BOARDINFO, board_number, i, BoardInfo.ADDATARATE, rate)
+        # Formats channel as a list
+        channels = [channel] if type(channel) is int else channel
+
+        # Sets channel type to TC (thermocouple), thermocouple type, temperature scale to Celsius, and data rate
+        Controller.configure({x: {BoardInfo.ADCHANTYPE: AiChanType.TC,
+                                  BoardInfo.CHANTCTYPE: thermocouple_type,
+                                  BoardInfo.TEMPSCALE: TempScale.CELSIUS,
+                                  BoardInfo.ADDATARATE: rate} for x in channels}, board_number)
 
     @staticmethod
     def thermocouple_instantaneous_read(channel: int | list[int], board_number=0):
@@ -584,103 +1293,561 @@ class Controller:
 
         # If channel is single value read and return single channel
         if type(channel) is int:
-            return ul.t_in(board_number, channel, TempScale.CELSIUS, options)
+            with Timings.span('t_in channel ' + str(channel)):
+                return ul.t_in(board_number, channel, TempScale.CELSIUS, options)
 
         # If channel is list read and return list for every channel in list
         if type(channel) is list:
-            return [ul.t_in(board_number, x, TempScale.CELSIUS, options) for x in channel]
+            temperatures = []
+            for x in channel:
+                with Timings.span('t_in channel ' + str(x)):
+                    temperatures.append(ul.t_in(board_number, x, TempScale.CELSIUS, options))
+            return temperatures
 
     @staticmethod
-    def initialize_analog_read(channel: int | list[int], board_number=0, rate=60):
+    def thermocouple_scan_read(channel: int | list[int], board_number=0):
         """
-        Initializes channels to read by analog.
+        Reads thermocouples with as few t_in_scan calls as possible instead of one t_in call per channel.
+        Faster alternative to Controller.thermocouple_instantaneous_read(). Channels are grouped into scans by
+        Controller.plan_scan(), so [0, 1, 8] is read as scans 0-1 and 8, or 0-8 if channels 2-7 are thermocouples and
+        scanning them is faster than another call.
 
-        :param channel: Channel or list of channels to be initialized
-        :param board_number: Number of board
-        :param rate: Rate in hertz at which channel is read.
+        :param board_number: Board number
+        :param channel: Desired channel or channels to read
+        :return: Temperature in celsius as either a single float or a NumPy array of floats in the order given
         """
+        # Configure options for thermocouple read
+        options = TInOptions.NOFILTER
 
-        # If channel is a single channel
-        if type(channel) is int:
-            # configure the channel for voltage
-            ul.set_config(InfoType.BOARDINFO, board_number, channel, BoardInfo.ADCHANTYPE, AiChanType.VOLTAGE)
+        # Formats channel as a list
+        channels = [channel] if type(channel) is int else channel
 
-            # Set channel to differential mode
-            ul.a_chan_input_mode(board_number, channel, AnalogInputMode.DIFFERENTIAL)
+        plan = Controller.plan_scan(channels, 't_in_scan', board_number)
+        temperatures = np.empty(len(channels))
 
-            # Set channel rate
-            ul.set_config(InfoType.BOARDINFO, board_number, channel, BoardInfo.ADDATARATE, rate)
+        for (low_channel, high_channel), (columns, outputs) in zip(plan.scans, plan.selections):
+            with Timings.span('t_in_scan channels ' + str(low_channel) + '-' + str(high_channel)):
+                err_code, data_array = ul.t_in_scan(board_number, low_channel, high_channel, TempScale.CELSIUS, options)
 
-        # If channel is a list of channels
-        if type(channel) is list:
+            # Views scanned temperatures without copying, dropping channels that weren't requested
+            scan_temperatures = np.ctypeslib.as_array(data_array)[columns]
 
-            for x in channel:
-                # configure the channel for voltage
-                ul.set_config(InfoType.BOARDINFO, board_number, x, BoardInfo.ADCHANTYPE, AiChanType.VOLTAGE)
+            # Raises error for open or out of range thermocouples, as ul.t_in() would.
+            # Open or out of range thermocouples that weren't requested are ignored.
+            if err_code != ErrorCode.NOERRORS and not (err_code in (ErrorCode.OPENCONNECTION, ErrorCode.OUTOFRANGE) and
+                                                       np.all(scan_temperatures > Controller.invalid_temperature_limit)):
+                raise ULError(err_code)
 
-                # Set channel to differential mode
-                ul.a_chan_input_mode(board_number, x, AnalogInputMode.DIFFERENTIAL)
+            temperatures[outputs] = scan_temperatures
+
+        # If channel is single value return single value
+        if type(channel) is int:
+            return float(temperatures[0])
 
-                # Set channel rate
-                ul.set_config(InfoType.BOARDINFO, board_number, x, BoardInfo.ADDATARATE, rate)
+        return temperatures
 
     @staticmethod
-    def analog_read(channel: int | list[int], board_number=0):
+    def channel_ranges(channels: list[int]):
         """
-        Function to read analog data from specified channels.
+        Groups channels into contiguous ranges for scanning.
 
-        :param channel: Either int of list of ints that specifies channel to read.
-        :param board_number: Board Number
-        :return: Returns voltage of channels as either a single float or a list of floats
+        :param channels: List of channels
+        :return: List of tuples of the form: (low_channel, high_channel)
         """
+        ranges = []
 
-        # If channels is a single channel
-        if type(channel) is int:
+        for x in sorted(set(channels)):
 
-            # Initialize array to average data points
-            voltage = []
+            # Extends current range if channel is next to it, otherwise starts a new range
+            if ranges and x == ranges[-1][1] + 1:
+                ranges[-1] = (ranges[-1][0], x)
+            else:
+                ranges.append((x, x))
 
-            # Get values for 5-point average
-            for _ in range(5):
-                # Read data from the channel:
-                value_counts = ul.a_in_32(board_number, channel, ULRange.BIP20VOLTS, 0)
+        return ranges
 
-                # Convert from counts to volts
-                value_volts = ul.to_eng_units_32(board_number, ULRange.BIP20VOLTS, value_counts)
+    @staticmethod
+    def plan_scan(channels: list[int], function: str, board_number=0, samples=1, rate=None):
+        """
+        Plans the cheapest set of scans that read a list of channels.
+        Contiguous runs of channels are merged into one scan when scanning the channels between them is faster than
+        another call, which is only done if those channels are configured as the same type, as the board can't scan
+        mixed types. Analog scans use one scan of a channel-gain queue of just the channels read instead, if the board
+        supports one and it is cheaper. Cost of each scan is estimated from Controller.scan_latency and the data rate
+        of every channel scanned.
 
-                # Add voltage to main array for average calculation
-                voltage.append(value_volts)
+        Plans are cached until channels are reconfigured.
 
-            return np.average(voltage)
+        :param channels: Channels to read, in the order values are returned
+        :param function: Board function to scan with, 't_in_scan' or 'a_in_scan'
+        :param board_number: Number of board
+        :param samples: Number of samples of each channel taken by a_in_scan
+        :param rate: Scan rate of a_in_scan in samples per second per channel
+        :return: ScanPlan
+        """
+        key = (function, tuple(channels), board_number, samples, rate)
+        if key in Controller.scan_plans:
+            return Controller.scan_plans[key]
 
-        # If channels is a single channel
-        if type(channel) is list:
+        # Type every scanned channel must be configured as
+        channel_type = AiChanType.TC if function == 't_in_scan' else AiChanType.VOLTAGE
 
-            # Initialize list to save channels voltage to
-            channel_voltage = []
+        def cost(scanned):
+            """
+            Estimates time in seconds of one scan of a list of channels.
+            """
+            conversions = sum(1 / Controller.board_state.get((board_number, x, BoardInfo.ADDATARATE), Controller.default_data_rate)
+                              for x in scanned)
+            if function == 't_in_scan':
+                return Controller.scan_latency[function] + conversions
+            return Controller.scan_latency[function] + samples * max(1 / rate, conversions)
+
+        # Gets contiguous runs of channels, and whether each gap between runs can be scanned
+        runs = Controller.channel_ranges(channels)
+        gaps = [all(Controller.channel_type(board_number, x) == channel_type for x in range(runs[i][1] + 1, runs[i + 1][0]))
+                for i in range(len(runs) - 1)]
+
+        # Finds cheapest way to merge runs. best[i] is the cost and scans of reading the first i runs.
+        best = [(0.0, [])]
+        for i in range(1, len(runs) + 1):
+            options = []
+            for j in range(i - 1, -1, -1):
+                options.append((best[j][0] + cost(range(runs[j][0], runs[i - 1][1] + 1)),
+                                best[j][1] + [(runs[j][0], runs[i - 1][1])]))
+
+                # Stops at gaps that can't be scanned
+                if j > 0 and not gaps[j - 1]:
+                    break
+            best.append(min(options, key=lambda x: x[0]))
+        plan_cost, scans = best[-1]
+
+        # Uses one scan of a channel-gain queue of just the requested channels instead, if it is cheaper
+        gain_queue = sorted(set(channels))
+        scanned = sum(x[1] - x[0] + 1 for x in scans)
+        if (function == 'a_in_scan' and (len(scans) > 1 or scanned > len(gain_queue)) and
+                Controller.gain_queue_supported(board_number) and cost(gain_queue) < plan_cost):
+            plan = ScanPlan(function, channels, [(gain_queue[0], gain_queue[-1])], gain_queue, cost(gain_queue))
+        else:
+            plan = ScanPlan(function, channels, scans, None, plan_cost)
 
-            for x in channel:
+        Controller.scan_plans[key] = plan
+        return plan
 
-                # Initialize array to average data points
-                voltage = []
+    @staticmethod
+    def channel_type(board_number: int, channel: int):
+        """
+        Gets type of a channel from cached board state, reading it back from the board if it isn't cached.
 
-                # Get values for 5-point average
+        :return: AiChanType value, or None if unknown
+        """
+        key = (board_number, channel, BoardInfo.ADCHANTYPE)
+        if key not in Controller.board_state:
+            Controller.board_state[key] = Controller.read_config(board_number, channel, BoardInfo.ADCHANTYPE)
+        return Controller.board_state[key]
+
+    @staticmethod
+    def gain_queue_supported(board_number: int):
+        """
+        Checks if board has a channel-gain queue by disabling it, as mcculw's AiInfo does. Result is cached.
+        """
+        if board_number not in Controller.gain_queue_support:
+            try:
+                ul.a_load_queue(board_number, [], [], 0)
+                Controller.gain_queue_support[board_number] = Controller.use_gain_queue
+            except ULError:
+                Controller.gain_queue_support[board_number] = False
+            Controller.loaded_queues[board_number] = None
+        return Controller.gain_queue_support[board_number]
+
+    @staticmethod
+    def load_queue(board_number: int, channels: list[int] | None):
+        """
+        Loads channels into board's channel-gain queue, or disables queue if channels is None.
+        Nothing is sent if the queue is already loaded with channels.
+
+        :param board_number: Number of board
+        :param channels: Channels to scan, or None to scan ranges of channels
+        """
+        if Controller.loaded_queues.get(board_number) == channels:
+            return
+
+        # Forgets queue first, so it is loaded again if loading fails
+        Controller.loaded_queues[board_number] = 'unknown'
+        if channels is None:
+            ul.a_load_queue(board_number, [], [], 0)
+        else:
+            ul.a_load_queue(board_number, channels, [ULRange.BIP20VOLTS] * len(channels), len(channels))
+        Controller.loaded_queues[board_number] = channels
+
+    @staticmethod
+    def initialize_analog_read(channel: int | list[int], board_number=0, rate=60):
+        """
+        Initializes channels to read by analog.
+        Only settings that differ from the board's current state are sent, see Controller.configure().
+
+        :param channel: Channel or list of channels to be initialized
+        :param board_number: Number of board
+        :param rate: Rate in hertz at which channel is read.
+        """
+
+        # Formats channel as a list
+        channels = [channel] if type(channel) is int else channel
+
+        # Configures channels for voltage in differential mode at rate
+        Controller.configure({x: {BoardInfo.ADCHANTYPE: AiChanType.VOLTAGE,
+                                  BoardInfo.ADCHANAIMODE: AnalogInputMode.DIFFERENTIAL,
+                                  BoardInfo.ADDATARATE: rate} for x in channels}, board_number)
+
+    @staticmethod
+    def configure(channel_settings: dict, board_number=0):
+        """
+        Sets channels to a desired state, sending only settings that differ from the board's current state, as each
+        setting sent is a separate USB transaction.
+        The board's state is cached from earlier calls. Settings not yet cached are read back from the board with
+        ul.get_config() if Controller.read_back_config is True, otherwise they are sent once and cached. Settings are
+        sent in the order given. Changing a channel's type may reset its other settings, so they are read back again.
+
+        Time spent is added to Controller.configuration_time and to Timings as 'Controller.configure'.
+
+        :param channel_settings: Dict of the form: {channel: {BoardInfo item: value, ...}, ...}.
+                                 BoardInfo.ADCHANAIMODE is set with ul.a_chan_input_mode().
+        :param board_number: Number of board
+        :return: Number of settings sent
+        """
+        start = time.perf_counter_ns()
+
+        # Initializes counts of settings sent and already set
+        sent = 0
+        skipped = 0
+
+        for channel, settings in channel_settings.items():
+            for item, value in settings.items():
+                key = (board_number, channel, item)
+
+                # Gets current state of setting if it isn't cached
+                if key not in Controller.board_state:
+                    Controller.board_state[key] = Controller.read_config(board_number, channel, item)
+
+                # Skips settings already set
+                if Controller.board_state[key] == value:
+                    skipped += 1
+                    continue
+
+                try:
+                    with Timings.span('set_config ' + item.name + ' channel ' + str(channel)):
+                        if item == BoardInfo.ADCHANAIMODE:
+                            ul.a_chan_input_mode(board_number, channel, value)
+                        else:
+                            ul.set_config(InfoType.BOARDINFO, board_number, channel, item, value)
+
+                # Forgets state of setting if it failed, as it may have been partly set
+                except Exception:
+                    Controller.board_state.pop(key, None)
+                    raise
+
+                Controller.board_state[key] = value
+                Controller.last_sent_config[board_number] = (channel, item)
+                sent += 1
+
+                # Forgets other settings of channel when its type changes, so they are read back again
+                if item == BoardInfo.ADCHANTYPE:
+                    for other in [x for x in Controller.board_state if x[:2] == key[:2] and x != key]:
+                        del Controller.board_state[other]
+
+        # Plans scans again, as channel types and data rates may have changed
+        if sent:
+            Controller.scan_plans.clear()
+
+        duration = (time.perf_counter_ns() - start) / 1e6
+        Timings.add('Controller.configure', duration)
+        Controller.configuration_time += duration / 1000
+        Controller.configuration_sent += sent
+        Controller.configuration_skipped += skipped
+
+        return sent
+
+    @staticmethod
+    def board_id(board_number=0):
+        """
+        Gets unique ID of a board, i.e. its serial number, which identifies its saved board state.
+
+        :param board_number: Number of board
+        :return: Unique ID as a string, or None if the board can't report it
+        """
+        try:
+            return ul.get_config_string(InfoType.BOARDINFO, board_number, 0, BoardInfo.DEVUNIQUEID, 32)
+        except ULError:
+            return None
+
+    @staticmethod
+    def load_board_state(channels: list[int] = None, board_number=0, path: str = None):
+        """
+        Loads a board's state saved by Controller.save_board_state(), so settings already set by an earlier launch
+        aren't read back or sent again.
+        The board's driver or InstaCal may have reset its settings since then, so one saved setting, the last one sent
+        or else the first one saved, is read back. If it doesn't match, the saved state is discarded and settings are
+        read back as they are configured. The type of each channel is also read back, as it may have been changed
+        outside the app, i.e. in InstaCal or another script. Saved settings of a channel whose type changed are
+        dropped, so the channel is configured again.
+
+        :param channels: Channels used, whose saved settings are loaded. Defaults to every channel saved.
+        :param board_number: Number of board
+        :param path: Path of file, defaults to Controller.board_state_path
+        :return: Number of settings loaded
+        """
+        path = path or Controller.board_state_path
+        if not Controller.read_back_config:
+            return 0
+
+        with Timings.span('Controller.load_board_state'):
+            try:
+                with open(path, 'r') as file:
+                    entry = json.load(file).get(str(Controller.board_id(board_number)))
+            except FileNotFoundError:
+                return 0
+
+            # If any other error occurs, reads back settings as they are configured
+            except Exception as e:
+                print("Board state could not be read: " + repr(e))
+                return 0
+
+            if not entry or not entry['settings']:
+                return 0
+
+            # Checks that the board still has the saved state
+            channel, item, value = next((x for x in entry['settings'] if x[:2] == entry['last_sent']), entry['settings'][0])
+            if Controller.read_config(board_number, channel, BoardInfo(item)) != value:
+                print("Board settings changed since they were saved. Reading them back again.")
+                return 0
+
+            # Initializes dict of saved settings, of the form: {(channel, BoardInfo): value}
+            settings = {(channel, BoardInfo(item)): value for channel, item, value in entry['settings']}
+
+            # Keeps saved settings of channels whose type is unchanged. Types read back are cached either way.
+            loaded = {}
+            for channel in sorted({x[0] for x in settings} if channels is None else set(channels)):
+                channel_type = Controller.read_config(board_number, channel, BoardInfo.ADCHANTYPE)
+                if channel_type is None:
+                    continue
+                if settings.get((channel, BoardInfo.ADCHANTYPE)) == channel_type:
+                    loaded.update({x: value for x, value in settings.items() if x[0] == channel})
+                else:
+                    print("Channel " + str(channel) + " type changed since it was saved. Configuring it again.")
+                loaded[(channel, BoardInfo.ADCHANTYPE)] = channel_type
+
+            for (channel, item), value in loaded.items():
+                Controller.board_state[(board_number, channel, item)] = value
+            if entry['last_sent'] is not None:
+                Controller.last_sent_config[board_number] = (entry['last_sent'][0], BoardInfo(entry['last_sent'][1]))
+
+        return len(loaded)
+
+    @staticmethod
+    def save_board_state(path: str = None):
+        """
+        Saves known settings of each board that reports a unique ID, keeping saved states of other boards.
+        File is replaced in one step, so a crash can't leave it half written.
+
+        :param path: Path of file, defaults to Controller.board_state_path
+        """
+        path = path or Controller.board_state_path
+
+        try:
+            with open(path, 'r') as file:
+                boards = json.load(file)
+        except (OSError, ValueError):
+            boards = {}
+
+        for board_number in {x[0] for x in Controller.board_state}:
+            board_id = Controller.board_id(board_number)
+            if board_id is None:
+                continue
+            last_sent = Controller.last_sent_config.get(board_number)
+            boards[board_id] = {'settings': [[channel, int(item), value] for (board, channel, item), value in Controller.board_state.items()
+                                             if board == board_number and value is not None],
+                                'last_sent': [last_sent[0], int(last_sent[1])] if last_sent else None}
+
+        with open(path + '.tmp', 'w') as file:
+            json.dump(boards, file)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def read_config(board_number: int, channel: int, item):
+        """
+        Reads back a setting of a channel from the board.
+
+        :param board_number: Number of board
+        :param channel: Channel
+        :param item: BoardInfo item
+        :return: Value of setting, or None if it isn't read back or the board can't report it
+        """
+        if not Controller.read_back_config:
+            return None
+
+        try:
+            with Timings.span('get_config ' + item.name + ' channel ' + str(channel)):
+                return ul.get_config(InfoType.BOARDINFO, board_number, channel, item)
+        except ULError:
+            return None
+
+    @staticmethod
+    def analog_read(channel: int | list[int], board_number=0):
+        """
+        Function to read analog data from specified channels.
+
+        :param channel: Either int of list of ints that specifies channel to read.
+        :param board_number: Board Number
+        :return: Returns voltage of channels as either a single float or a list of floats
+        """
+
+        # If channels is a single channel
+        if type(channel) is int:
+
+            # Initialize array to average data points
+            voltage = []
+
+            # Get values for 5-point average
+            with Timings.span('a_in_32 channel ' + str(channel)):
                 for _ in range(5):
                     # Read data from the channel:
-                    value_counts = ul.a_in_32(board_number, x, ULRange.BIP20VOLTS, 0)
+                    value_counts = ul.a_in_32(board_number, channel, ULRange.BIP20VOLTS, 0)
 
                     # Convert from counts to volts
                     value_volts = ul.to_eng_units_32(board_number, ULRange.BIP20VOLTS, value_counts)
 
-                    # Add voltage value to single array
+                    # Add voltage to main array for average calculation
                     voltage.append(value_volts)
 
+            return np.average(voltage)
+
+        # If channels is a single channel
+        if type(channel) is list:
+
+            # Initialize list to save channels voltage to
+            channel_voltage = []
+
+            for x in channel:
+
+                # Initialize array to average data points
+                voltage = []
+
+                # Get values for 5-point average
+                with Timings.span('a_in_32 channel ' + str(x)):
+                    for _ in range(5):
+                        # Read data from the channel:
+                        value_counts = ul.a_in_32(board_number, x, ULRange.BIP20VOLTS, 0)
+
+                        # Convert from counts to volts
+                        value_volts = ul.to_eng_units_32(board_number, ULRange.BIP20VOLTS, value_counts)
+
+                        # Add voltage value to single array
+                        voltage.append(value_volts)
+
                 # Add 5-point average to respective channel
                 channel_voltage.append(np.average(voltage))
 
             # Returns array with data from all channels
             return channel_voltage
 
+    @staticmethod
+    def analog_scan(channel: int | list[int], board_number=0, samples=5, rate=20):
+        """
+        Function to read a hardware-timed block of analog data from specified channels with as few a_in_scan calls as
+        possible. Channels are grouped into scans by Controller.plan_scan(). Scans cover every channel from their
+        lowest to highest channel, so channels inside that range that are not requested are scanned but discarded, and
+        must be configured for voltage. Boards with a channel-gain queue scan only the requested channels.
+
+        :param channel: Either int or list of ints that specifies channel to read.
+        :param board_number: Board Number
+        :param samples: Number of samples to take per channel
+        :param rate: Scan rate in samples per second per channel
+        :return: Returns voltages as a NumPy array of shape (samples, channels), with columns in the order given
+        """
+
+        # Formats channel as a list
+        channels = [channel] if type(channel) is int else channel
+
+        # Copies requested channels of each scan out before its buffer is freed
+        voltage = np.empty((samples, len(channels)))
+        for scan_voltage, outputs in Controller.analog_scan_blocks(channels, board_number, samples, rate):
+            voltage[:, outputs] = scan_voltage
+
+        return voltage
+
+    @staticmethod
+    def analog_scan_blocks(channels: list[int], board_number=0, samples=5, rate=20):
+        """
+        Runs each a_in_scan planned for channels, yielding the requested channels of each as a view of its buffer.
+        Views are only valid until the next scan, as the buffer is then freed.
+
+        :param channels: List of channels to read
+        :param board_number: Board Number
+        :param samples: Number of samples to take per channel
+        :param rate: Scan rate in samples per second per channel
+        :return: Generator of tuples of the form: (voltages of shape (samples, requested channels in scan), positions of
+                 channels in channels)
+        """
+        plan = Controller.plan_scan(channels, 'a_in_scan', board_number, samples, rate)
+
+        for (low_channel, high_channel), scanned, (columns, outputs) in zip(plan.scans, plan.scanned, plan.selections):
+            channel_count = len(scanned)
+            total_count = samples * channel_count
+
+            # Allocates buffer for scaled data
+            memhandle = ul.scaled_win_buf_alloc(total_count)
+
+            # Checks if the buffer was successfully allocated
+            if not memhandle:
+                raise MemoryError("Failed to allocate scan buffer.")
+
+            try:
+                # Loads queue of channels to scan, or disables queue to scan range
+                Controller.load_queue(board_number, plan.queue)
+
+                # Runs scan and waits for it to complete. SCALEDATA makes the board return volts directly.
+                with Timings.span('a_in_scan channels ' + str(low_channel) + '-' + str(high_channel)):
+                    ul.a_in_scan(board_number, low_channel, high_channel, total_count, rate, ULRange.BIP20VOLTS, memhandle,
+                                 ScanOptions.FOREGROUND | ScanOptions.SCALEDATA)
+
+                # Views buffer as a NumPy array. Data is interleaved by channel, so each row is one scan.
+                scan_data = np.ctypeslib.as_array(cast(memhandle, POINTER(c_double)), shape=(total_count,))
+                scan_data = scan_data.reshape(samples, channel_count)
+
+                # Selects requested channels. Evenly spaced channels are selected with a view instead of a copy.
+                yield scan_data[:, columns], outputs
+
+            finally:
+                # Frees buffer in a finally block to prevent errors from causing a memory leak
+                ul.win_buf_free(memhandle)
+
+    @staticmethod
+    def analog_scan_read(channel: int | list[int], board_number=0, samples=5, rate=20):
+        """
+        Function to read averaged analog data from specified channels using a hardware-timed scan.
+        Faster alternative to Controller.analog_read(). Use Controller.analog_read() for boards that do not support
+        a_in_scan.
+
+        :param channel: Either int or list of ints that specifies channel to read.
+        :param board_number: Board Number
+        :param samples: Number of samples to average per channel
+        :param rate: Scan rate in samples per second per channel
+        :return: Returns voltage of channels as either a single float or a NumPy array of floats
+        """
+
+        # Formats channel as a list
+        channels = [channel] if type(channel) is int else channel
+
+        # Averages every channel of each scan at once, straight from its buffer
+        voltage = np.empty(len(channels))
+        for scan_voltage, outputs in Controller.analog_scan_blocks(channels, board_number, samples, rate):
+            voltage[outputs] = scan_voltage.mean(axis=0)
+
+        # If channel is a single channel return single value
+        if type(channel) is int:
+            return float(voltage[0])
+
+        return voltage
+
     @staticmethod
     def analog_out(channel: int | list[int], voltage: float, board_number=0):
         """
@@ -704,318 +1871,2393 @@ class Controller:
             # For each channel in list
             for c in channel:
 
-                # Converts voltage to MCC counts and sets channel
-                a_out_counts = ul.from_eng_units(board_number, ULRange.BIP10VOLTS, voltage)
-                ul.a_out(board_number, c, ULRange.BIP10VOLTS, a_out_counts)
+                # Converts voltage to MCC counts and sets channel
+                a_out_counts = ul.from_eng_units(board_number, ULRange.BIP10VOLTS, voltage)
+                ul.a_out(board_number, c, ULRange.BIP10VOLTS, a_out_counts)
+
+
+class ScanPlan:
+
+    def __init__(self, function: str, channels: list[int], scans: list[tuple], gain_queue: list[int] = None, cost=0.0):
+        """
+        Scans that read a list of channels, made by Controller.plan_scan().
+        For each scan, the columns of requested channels and their positions in the returned values are kept as slices
+        where they are evenly spaced, so unused channels are dropped with NumPy views instead of copies.
+
+        :param function: Board function to scan with, 't_in_scan' or 'a_in_scan'
+        :param channels: Channels read, in the order values are returned
+        :param scans: List of channel ranges to scan, of the form: [(low_channel, high_channel), ...]
+        :param gain_queue: Channels loaded into channel-gain queue for a single scan, or None to scan ranges
+        :param cost: Estimated time of reading in seconds
+        """
+        self.function = function
+        self.channels = list(channels)
+        self.scans = scans
+        self.queue = gain_queue
+        self.cost = cost
+
+        # Initializes channels scanned, and requested columns and their positions in returned values of each scan
+        self.scanned = []
+        self.selections = []
+
+        for low_channel, high_channel in scans:
+            scanned = gain_queue if gain_queue is not None else list(range(low_channel, high_channel + 1))
+            pairs = sorted((scanned.index(x), i) for i, x in enumerate(self.channels) if x in scanned)
+            self.scanned.append(scanned)
+            self.selections.append((ScanPlan.as_slice([x[0] for x in pairs]), ScanPlan.as_slice([x[1] for x in pairs])))
+
+    def __repr__(self):
+        scans = ", ".join(str(x[0]) + "-" + str(x[1]) for x in self.scans)
+        return (f"ScanPlan({self.function} {'queue ' + str(self.queue) if self.queue is not None else scans}, "
+                f"{self.cost * 1000:.1f} ms)")
+
+    @staticmethod
+    def as_slice(positions: list[int]):
+        """
+        Gets positions as a slice if they are evenly spaced and increasing, so indexing with them makes a view.
+
+        :param positions: List of indexes
+        :return: slice, or NumPy array of indexes
+        """
+        steps = set(np.diff(positions))
+        if len(positions) == 1 or len(steps) == 1 and steps.pop() > 0:
+            step = positions[1] - positions[0] if len(positions) > 1 else 1
+            return slice(positions[0], positions[-1] + 1, step)
+        return np.array(positions, dtype=np.intp)
+
+
+class SimulatedULError(Exception):
+
+    def __init__(self, errorcode):
+        """
+        Error raised by SimulatedBoard, with the same attributes as mcculw.ul.ULError.
+
+        :param errorcode: ErrorCode of error
+        """
+        self.errorcode = errorcode
+        self.message = "Simulated board error: " + getattr(errorcode, 'name', str(errorcode))
+        super().__init__(self.message)
+
+
+class SimulatedBoard:
+
+    # Error class raised by board functions
+    ULError = SimulatedULError
+
+    # Latency in seconds of each call to the board, not including conversion time. These are estimates, not measured on
+    # the board. Reads and writes of settings are each a USB transaction, so they are given the same latency.
+    default_latency = {'set_config': 0.0002, 'get_config': 0.0002, 'get_config_string': 0.0002, 'a_chan_input_mode': 0.0002,
+                       'a_load_queue': 0.0002, 'a_in_32': 0.0008, 't_in': 0.0008, 't_in_scan': 0.001, 'a_in_scan': 0.003,
+                       'a_out': 0.0008}
+
+    # Full scale of analog ranges in volts
+    ranges = {ULRange.BIP20VOLTS: 20, ULRange.BIP10VOLTS: 10}
+
+    # Settings of channels not yet configured, as if set in InstaCal
+    default_config = {BoardInfo.ADCHANTYPE: AiChanType.VOLTAGE, BoardInfo.CHANTCTYPE: TcType.J,
+                      BoardInfo.TEMPSCALE: TempScale.CELSIUS, BoardInfo.ADCHANAIMODE: AnalogInputMode.DIFFERENTIAL}
+
+    def __init__(self, latency: dict = None, noise: dict = None, signals: dict = None, open_channels=(),
+                 out_of_range_channels=(), data_rate=60, resolution=24, seed=None, realtime=True, gain_queue=True,
+                 unique_id='SIMULATED'):
+        """
+        Simulated MCC board with the functions of mcculw.ul used by Controller, so the app can run, be tested, and be
+        benchmarked without the board or its driver. Used when the MCC_DAQ_SIMULATE environment variable is 1, true, or
+        yes, or when not on Windows, otherwise use Controller.set_backend(SimulatedBoard()). The app shows "SIMULATED" in
+        its title while it is used.
+
+        Each call takes its latency plus the conversion time of each channel read, which is 1 / data rate as set with
+        BoardInfo.ADDATARATE. Values are the channel's signal at the time of the read plus Gaussian noise, which grows
+        with the square root of data rate as on the board.
+
+        :param latency: Dict of function names and latency in seconds, replacing values in SimulatedBoard.default_latency
+        :param noise: Dict of 'thermocouple' and 'voltage' noise standard deviation at 60 Hz in °C and V
+        :param signals: Dict of channels and functions of time in seconds returning °C for thermocouple channels or V
+        for others. Channels not given have a slow sine wave around room temperature or 1 V.
+        :param open_channels: Channels that read as open thermocouples
+        :param out_of_range_channels: Channels that read as thermocouples out of range
+        :param data_rate: Data rate in Hz of channels not configured with BoardInfo.ADDATARATE
+        :param resolution: Bits of analog input counts
+        :param seed: Seed of noise, for repeatable values
+        :param realtime: If False, calls return right away instead of taking their latency, i.e. for benchmarks
+        :param gain_queue: If False, board has no channel-gain queue
+        :param unique_id: Unique ID board reports, i.e. its serial number
+        """
+
+        # Initializes parameters for use throughout class
+        self.latency = {**SimulatedBoard.default_latency, **(latency or {})}
+        self.noise = {'thermocouple': 0.05, 'voltage': 0.0005, **(noise or {})}
+        self.signals = signals or {}
+        self.open_channels = set(open_channels)
+        self.out_of_range_channels = set(out_of_range_channels)
+        self.data_rate = data_rate
+        self.resolution = resolution
+        self.realtime = realtime
+        self.gain_queue = gain_queue
+        self.unique_id = unique_id
+        self.random = np.random.default_rng(seed)
+
+        # Time signals start from
+        self.start_time = time.perf_counter()
+
+        # Initializes config of each channel, of the form: {(board, channel, BoardInfo): value}
+        self.config = {}
+
+        # Initializes voltage of each analog output channel
+        self.outputs = {}
+
+        # Initializes scan buffers, of the form: {handle: ctypes array}
+        self.buffers = {}
+
+        # Initializes channels loaded in channel-gain queue of each board, which a_in_scan scans instead of a range
+        self.queues = {}
+
+    def wait(self, function: str, conversions=0.0):
+        """
+        Waits for the latency of a call.
+
+        :param function: Name of function called
+        :param conversions: Time in seconds to convert channels
+        """
+        if self.realtime:
+            time.sleep(self.latency.get(function, 0) + conversions)
+
+    def channel_data_rate(self, board_num: int, channel: int):
+        """
+        Gets data rate of a channel in Hz.
+        """
+        return self.config.get((board_num, channel, BoardInfo.ADDATARATE), self.data_rate)
+
+    def signal(self, board_num: int, channel: int, thermocouple: bool, sample_time: float = None):
+        """
+        Gets value of a channel with noise.
+
+        :param board_num: Board number
+        :param channel: Channel read
+        :param thermocouple: True to get °C, otherwise V
+        :param sample_time: Time in seconds since board was created, defaults to now
+        :return: Value of channel
+        """
+        if sample_time is None:
+            sample_time = time.perf_counter() - self.start_time
+
+        # Gets signal without noise
+        if channel in self.signals:
+            value = self.signals[channel](sample_time)
+        elif thermocouple:
+            value = 22 + 0.5 * np.sin(2 * np.pi * sample_time / 600 + channel)
+        else:
+            value = 1 + 0.05 * np.sin(2 * np.pi * sample_time / 300 + channel)
+
+        # Adds noise, which grows with data rate
+        noise = self.noise['thermocouple' if thermocouple else 'voltage']
+        return float(value + self.random.normal(0, noise * np.sqrt(self.channel_data_rate(board_num, channel) / 60)))
+
+    def set_config(self, info_type, board_num, dev_num, config_item, config_val):
+        self.wait('set_config')
+        self.config[(board_num, dev_num, config_item)] = config_val
+
+    def get_config(self, info_type, board_num, dev_num, config_item):
+        self.wait('get_config')
+        if config_item == BoardInfo.ADDATARATE:
+            return self.channel_data_rate(board_num, dev_num)
+        if config_item not in SimulatedBoard.default_config:
+            raise SimulatedULError(ErrorCode.BADCONFIGITEM)
+        return self.config.get((board_num, dev_num, config_item), SimulatedBoard.default_config[config_item])
+
+    def get_config_string(self, info_type, board_num, dev_num, config_item, max_config_len):
+        self.wait('get_config_string')
+        if config_item != BoardInfo.DEVUNIQUEID:
+            raise SimulatedULError(ErrorCode.BADCONFIGITEM)
+        return self.unique_id[:max_config_len]
+
+    def a_chan_input_mode(self, board_num, channel, input_mode):
+        self.wait('a_chan_input_mode')
+        self.config[(board_num, channel, BoardInfo.ADCHANAIMODE)] = input_mode
+
+    def t_in(self, board_num, channel, scale, options=TInOptions.NOFILTER):
+        self.wait('t_in', 1 / self.channel_data_rate(board_num, channel))
+        if channel in self.open_channels:
+            raise SimulatedULError(ErrorCode.OPENCONNECTION)
+        if channel in self.out_of_range_channels:
+            raise SimulatedULError(ErrorCode.OUTOFRANGE)
+        return self.signal(board_num, channel, True)
+
+    def t_in_scan(self, board_num, low_chan, high_chan, scale, options=TInOptions.NOFILTER):
+        channels = range(low_chan, high_chan + 1)
+        self.wait('t_in_scan', sum(1 / self.channel_data_rate(board_num, x) for x in channels))
+
+        # Open and out of range thermocouples read as -9999 and return an error code, as on the board
+        invalid_channels = self.open_channels | self.out_of_range_channels
+        data_array = (c_float * len(channels))(*[-9999 if x in invalid_channels else self.signal(board_num, x, True)
+                                                 for x in channels])
+        if self.open_channels.intersection(channels):
+            err_code = ErrorCode.OPENCONNECTION
+        elif self.out_of_range_channels.intersection(channels):
+            err_code = ErrorCode.OUTOFRANGE
+        else:
+            err_code = ErrorCode.NOERRORS
+        return err_code, data_array
+
+    def a_in_32(self, board_num, channel, ul_range, options=0):
+        self.wait('a_in_32', 1 / self.channel_data_rate(board_num, channel))
+        return self.from_volts(self.signal(board_num, channel, False), ul_range, self.resolution)
+
+    def to_eng_units_32(self, board_num, ul_range, data_value):
+        return self.to_volts(data_value, ul_range, self.resolution)
+
+    def from_eng_units(self, board_num, ul_range, eng_units_value):
+        return self.from_volts(eng_units_value, ul_range, 16)
+
+    def a_out(self, board_num, channel, ul_range, data_value):
+        self.wait('a_out')
+        self.outputs[channel] = self.to_volts(data_value, ul_range, 16)
+
+    def scaled_win_buf_alloc(self, num_points):
+        buffer = (c_double * num_points)()
+        self.buffers[addressof(buffer)] = buffer
+        return addressof(buffer)
+
+    def win_buf_free(self, memhandle):
+        self.buffers.pop(memhandle, None)
+
+    def a_load_queue(self, board_num, chan_list, gain_list, count):
+        self.wait('a_load_queue')
+        if not self.gain_queue:
+            raise SimulatedULError(ErrorCode.BADBOARDTYPE)
+        self.queues[board_num] = list(chan_list[:count]) if count else None
+
+    def a_in_scan(self, board_num, low_chan, high_chan, num_points, rate, ul_range, memhandle, options):
+
+        # Only scaled foreground scans are simulated
+        if not options & ScanOptions.SCALEDATA or options & ScanOptions.BACKGROUND:
+            raise SimulatedULError(ErrorCode.BADOPTION)
+
+        # Scan takes one sample of every channel in queue, or in range if no queue is loaded, at rate
+        channels = self.queues.get(board_num) or list(range(low_chan, high_chan + 1))
+        channel_count = len(channels)
+        scans = num_points // channel_count
+        start_time = time.perf_counter() - self.start_time
+        self.wait('a_in_scan', scans / rate)
+
+        # Writes samples interleaved by channel
+        buffer = self.buffers[memhandle]
+        for i in range(scans):
+            for j in range(channel_count):
+                buffer[i * channel_count + j] = self.signal(board_num, channels[j], False, start_time + i / rate)
+
+        return rate
+
+    @staticmethod
+    def from_volts(volts: float, ul_range, bits: int):
+        """
+        Converts volts to counts of a range.
+        """
+        full_scale = SimulatedBoard.ranges.get(ul_range, 10)
+        volts = min(max(volts, -full_scale), full_scale)
+        return int(round((volts + full_scale) / (2 * full_scale) * (2 ** bits - 1)))
+
+    @staticmethod
+    def to_volts(counts: int, ul_range, bits: int):
+        """
+        Converts counts of a range to volts.
+        """
+        full_scale = SimulatedBoard.ranges.get(ul_range, 10)
+        return counts / (2 ** bits - 1) * 2 * full_scale - full_scale
+
+
+# Uses simulated board only when asked to by setting the MCC_DAQ_SIMULATE environment variable to 1, true, or yes, or when
+# not on Windows, where the MCC driver can't run. Other values such as 0 don't simulate. On Windows a driver that fails
+# to load is shown as an error instead, so simulated data is never recorded by mistake.
+if os.environ.get('MCC_DAQ_SIMULATE', '').strip().lower() in ('1', 'true', 'yes') or sys.platform != 'win32':
+    Controller.set_backend(SimulatedBoard())
+
+
+class RingBuffer:
+
+    def __init__(self, capacity: int, columns: int, dtype=np.float64):
+        """
+        Preallocated NumPy ring buffer for passing samples from a single writer thread to a single reader thread.
+        The writer fills rows before publishing the new row count, so the reader never needs a lock. If the writer
+        laps the reader, the oldest rows are dropped from the result instead of being returned half-written.
+
+        :param capacity: Number of rows held before the oldest rows are overwritten
+        :param columns: Number of columns in every row
+        :param dtype: NumPy data type of the buffer
+        """
+
+        # Initializes buffer
+        self.data = np.zeros((capacity, columns), dtype=dtype)
+        self.capacity = capacity
+
+        # Total number of rows ever written. Only the writer changes this, and only after the rows are in place.
+        self.count = 0
+
+    def write(self, rows):
+        """
+        Writes rows to the buffer. Must only be called from a single thread.
+
+        :param rows: Array-like of shape (n, columns)
+        """
+        rows = np.asarray(rows, dtype=self.data.dtype).reshape(-1, self.data.shape[1])
+        count = self.count + len(rows)
+
+        # Only the last capacity rows can be held
+        rows = rows[-self.capacity:]
+
+        # Gets positions of rows in the buffer, wrapping around the end
+        start = (count - len(rows)) % self.capacity
+        end = start + len(rows)
+
+        if end <= self.capacity:
+            self.data[start:end] = rows
+        else:
+            split = self.capacity - start
+            self.data[start:] = rows[:split]
+            self.data[:end - self.capacity] = rows[split:]
+
+        # Publishes rows to reader
+        self.count = count
+
+    def read_since(self, position: int):
+        """
+        Reads all rows written since position.
+
+        :param position: Value of RingBuffer.count returned by the previous read. Use 0 to read from the start.
+        :return: Tuple of the form: (rows, position) where rows is a copy of the new rows, oldest first
+        """
+        count = self.count
+
+        # Clamps to rows still held in buffer
+        first = max(position, count - self.capacity)
+
+        # Copies rows out of the buffer
+        rows = self.data[np.arange(first, count) % self.capacity]
+
+        # Drops rows the writer overwrote while they were being copied
+        lost = self.count - self.capacity - first
+        if lost > 0:
+            rows = rows[lost:]
+
+        return rows, count
+
+
+class Scheduler:
+
+    # Policies for ticks that finish after the next deadline
+    overrun_policies = ('skip', 'coalesce', 'catch_up')
+
+    def __init__(self, period: float, overrun='coalesce', jitter_samples=10000):
+        """
+        Schedules ticks at absolute deadlines of start + n * period on the monotonic time.perf_counter_ns() clock.
+        Deadlines are whole nanoseconds, so a late tick doesn't delay the ones after it and there is no drift however
+        long the scheduler runs. Call start() once, then tick() at the start of each tick and advance() at the end of it,
+        and wait next_delay() seconds between them.
+
+        If a tick finishes after the next deadline, the overrun policy decides what happens to the missed deadlines:
+            'skip'      Missed deadlines are dropped and the next tick is at the next deadline still to come.
+            'coalesce'  Missed deadlines are merged into one tick that runs right away, then ticks continue on schedule.
+            'catch_up'  Every missed tick runs right away, one after the other, until the scheduler is back on schedule.
+
+        :param period: Time in ms between ticks. Doesn't need to be a whole number.
+        :param overrun: Overrun policy, one of Scheduler.overrun_policies
+        :param jitter_samples: Number of recent ticks kept for jitter statistics
+        """
+
+        if overrun not in Scheduler.overrun_policies:
+            raise ValueError("Overrun policy must be one of: " + ", ".join(Scheduler.overrun_policies))
+
+        # Initializes parameters for use throughout class
+        self.period = period
+        self.period_ns = int(round(period * 1000000))
+        self.overrun = overrun
+
+        # Time of first deadline and number of deadline of next tick
+        self.start_ns = None
+        self.tick_number = 0
+
+        # Initializes jitter statistics. Jitter is how late each tick started in ns.
+        self.jitter = deque(maxlen=jitter_samples)
+        self.ticks = 0
+        self.overruns = 0
+        self.missed = 0
+        self.max_jitter = 0
+
+    def start(self, start_ns=None):
+        """
+        Starts schedule with first tick due now.
+
+        :param start_ns: Time of first tick in perf_counter_ns() nanoseconds, to put schedulers on one timeline
+        """
+        self.start_ns = time.perf_counter_ns() if start_ns is None else start_ns
+        self.tick_number = 0
+
+    @property
+    def deadline_ns(self):
+        """
+        Time of next deadline in perf_counter_ns() nanoseconds.
+        """
+        return self.start_ns + self.tick_number * self.period_ns
+
+    def next_delay(self):
+        """
+        Gets time left until next deadline.
+
+        :return: Time in seconds, 0 if deadline has passed
+        """
+        return max(self.deadline_ns - time.perf_counter_ns(), 0) / 1e9
+
+    def tick(self):
+        """
+        Records jitter of a tick. Call at the start of each tick.
+
+        :return: Time since scheduler was started in seconds
+        """
+        now = time.perf_counter_ns()
+
+        # Records how late tick is
+        jitter = now - self.deadline_ns
+        self.jitter.append(jitter)
+        self.max_jitter = max(self.max_jitter, jitter)
+        self.ticks += 1
+
+        return (now - self.start_ns) / 1e9
+
+    def advance(self):
+        """
+        Moves to next deadline, applying overrun policy if it has already passed. Call at the end of each tick.
+        """
+        self.tick_number += 1
+
+        # Checks for overrun
+        now = time.perf_counter_ns()
+        if now <= self.deadline_ns:
+            return
+        self.overruns += 1
+
+        # Number of deadlines that have passed since tick was due, including the next deadline
+        late = (now - self.deadline_ns) // self.period_ns + 1
+
+        # Drops missed deadlines, waiting for next one
+        if self.overrun == 'skip':
+            self.missed += late
+            self.tick_number += late
+
+        # Merges missed deadlines into one tick at the latest deadline that has passed
+        elif self.overrun == 'coalesce':
+            self.missed += late - 1
+            self.tick_number += late - 1
+
+        # Otherwise deadline is left as is, so missed ticks run one after another
+
+    def statistics(self):
+        """
+        Gets jitter statistics of recent ticks.
+
+        :return: Dict of tick count, overruns, missed deadlines and jitter in ms
+        """
+        jitter = np.array(self.jitter, dtype=np.float64) / 1e6
+        if not len(jitter):
+            jitter = np.zeros(1)
+        return {'ticks': self.ticks,
+                'overruns': self.overruns,
+                'missed': self.missed,
+                'mean_ms': float(jitter.mean()),
+                'std_ms': float(jitter.std()),
+                'p99_ms': float(np.percentile(jitter, 99)),
+                'max_ms': self.max_jitter / 1e6}
+
+
+class Timings:
+    """
+    Rolling timings of stages of the app, such as board reads, plot updates, and exports.
+    Each stage keeps its most recent durations, so percentiles show how long it takes now rather than on average
+    since startup. Stages are timed with:
+
+        with Timings.span('t_in channel 0'):
+            ul.t_in(0, 0, TempScale.CELSIUS)
+    """
+
+    # Number of recent durations kept for each stage
+    samples = 1000
+
+    # Durations in ms of each stage, of the form: {name: deque of durations}
+    stages = {}
+
+    # Lock for stages timed on more than one thread
+    lock = threading.Lock()
+
+    @staticmethod
+    @contextmanager
+    def span(name: str):
+        """
+        Times code run inside a with statement.
+
+        :param name: Name of stage
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            Timings.add(name, (time.perf_counter_ns() - start) / 1e6)
+
+    @staticmethod
+    def add(name: str, duration: float):
+        """
+        Adds duration of a stage.
+
+        :param name: Name of stage
+        :param duration: Duration in ms
+        """
+        with Timings.lock:
+            if name not in Timings.stages:
+                Timings.stages[name] = deque(maxlen=Timings.samples)
+            Timings.stages[name].append(duration)
+
+    @staticmethod
+    def statistics():
+        """
+        Gets statistics of recent durations of each stage, sorted by name.
+
+        :return: pandas DataFrame with a row for each stage of its count, mean, p50, p95, p99 and max in ms
+        """
+        with Timings.lock:
+            stages = {x: np.array(Timings.stages[x]) for x in sorted(Timings.stages)}
+
+        # Initialize list for rows of statistics
+        rows = []
+        for name, durations in stages.items():
+            p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+            rows.append([name, len(durations), durations.mean(), p50, p95, p99, durations.max()])
+
+        return pd.DataFrame(rows, columns=['Stage', 'Count', 'Mean (ms)', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)', 'Max (ms)'])
+
+    @staticmethod
+    def dump(path: str):
+        """
+        Saves statistics of each stage to a CSV file.
+
+        :param path: Path of CSV file
+        """
+        Timings.statistics().round(3).to_csv(path, index=False, encoding='utf-8-sig')
+
+    @staticmethod
+    def reset():
+        """
+        Removes all timings.
+        """
+        with Timings.lock:
+            Timings.stages.clear()
+
+
+class Acquisition(threading.Thread):
+
+    def __init__(self, groups: dict, capacity=100000, overrun='coalesce'):
+        """
+        Thread that reads groups of channels at their own fixed periods, independent of the GUI.
+        Every group is scheduled on one timeline starting at 0.0s, and when two reads are due the one with the earliest
+        deadline runs first. Every sample is written to the group's buffer in self.buffers as a row of the form:
+        (time in seconds, value, value, ...).
+        A group whose read raises an error stops, and its error is kept in self.errors, while other groups carry on.
+        Stopped groups are read again after restart().
+        The GUI should only read from self.buffers, and should hold self.lock for any other board calls so they do not
+        interleave with a read.
+
+            acquisition = Acquisition({'fast': (read_fast, 2, 50), 'slow': (read_slow, 3, 1000)})
+
+        :param groups: Dict of group names and tuples of the form: (function that reads the board and returns a list of
+        column values, number of values returned, time in ms between samples)
+        :param capacity: Number of samples held in each buffer
+        :param overrun: Policy for reads that take longer than the period. See Scheduler.
+        """
+        super().__init__(daemon=True)
+
+        # Initializes parameters for use throughout class
+        self.read_functions = {x: groups[x][0] for x in groups}
+        self.periods = {x: groups[x][2] for x in groups}
+
+        # Schedules reads of each group
+        self.schedulers = {x: Scheduler(groups[x][2], overrun) for x in groups}
+
+        # Initializes buffer of each group with an extra column for time
+        self.buffers = {x: RingBuffer(capacity, groups[x][1] + 1) for x in groups}
+
+        # Lock for board calls
+        self.lock = threading.Lock()
+
+        # Initializes stop flag and error of each group stopped by an error, of the form: {group: exception}
+        self.stopped = threading.Event()
+        self.errors = {}
+
+    def run(self):
+
+        # Starts every schedule on one timeline so first samples are at 0.0s
+        start_ns = time.perf_counter_ns()
+        for scheduler in self.schedulers.values():
+            scheduler.start(start_ns)
+
+        while not self.stopped.is_set():
+
+            # Waits for a restart if every group stopped on an error
+            groups = [x for x in self.schedulers if x not in self.errors]
+            if not groups:
+                self.stopped.wait(0.1)
+                continue
+
+            # Gets group due next
+            group = min(groups, key=lambda x: self.schedulers[x].deadline_ns)
+            scheduler = self.schedulers[group]
+
+            # Waits until its sample is due
+            if self.stopped.wait(scheduler.next_delay()):
+                break
+
+            # Gets time of sample
+            sample_time = scheduler.tick()
+
+            # Reads board
+            try:
+                with self.lock, Timings.span('read ' + group):
+                    values = self.read_functions[group]()
+
+            # Stops group on error and saves error for the GUI to report. Other groups carry on.
+            except Exception as e:
+                self.errors[group] = e
+                continue
+
+            # Writes sample to buffer
+            self.buffers[group].write([sample_time, *values])
+
+            # Moves group to its next deadline
+            scheduler.advance()
+
+    def restart(self):
+        """
+        Reads groups stopped by an error again, from their next deadline on the timeline.
+
+        :return: List of groups restarted
+        """
+        groups = list(self.errors)
+        for group in groups:
+
+            # Skips deadlines missed while group was stopped
+            scheduler = self.schedulers[group]
+            tick_number = -(-(time.perf_counter_ns() - scheduler.start_ns) // scheduler.period_ns)
+            scheduler.missed += max(tick_number - scheduler.tick_number, 0)
+            scheduler.tick_number = max(tick_number, scheduler.tick_number)
+
+            del self.errors[group]
+
+        return groups
+
+    def stop(self):
+        """
+        Stops thread and waits for the current read to finish.
+        """
+        self.stopped.set()
+        if self.is_alive():
+            self.join()
+
+
+class SampleStore:
+
+    def __init__(self, columns: list[str], dtypes: dict = None, chunk_size=65536):
+        """
+        Columnar store for samples. Holds a time column and one NumPy array per channel column.
+        Arrays are preallocated and grow by chunk_size rows at a time, so appending does not allocate every sample and
+        memory use only grows in fixed steps. Columns are read as views of the arrays without copying.
+
+        Views are only valid until the store next grows, so get new views after appending instead of keeping them.
+
+            samples = SampleStore(['Channel 0 (°C)', 'Channel 1 (°C)'])
+            samples.extend([0.0, 1.0], [[20.1, 21.3], [20.2, 21.4]])
+            samples.time            # array([0., 1.])
+            samples['Channel 1 (°C)'] # array([21.3, 21.4])
+
+        :param columns: Names of channel columns
+        :param dtypes: Dict of column names and NumPy data types. Columns not in dict use float64. Use float32 to halve
+        memory of channels that don't need double precision.
+        :param chunk_size: Number of rows to grow by
+        """
+
+        # Initializes parameters for use throughout class
+        self.columns = list(columns)
+        self.dtypes = {x: np.dtype((dtypes or {}).get(x, np.float64)) for x in self.columns}
+        self.chunk_size = chunk_size
+
+        # Number of rows stored and number of rows allocated
+        self.count = 0
+        self.capacity = chunk_size
+
+        # Initializes arrays for time and each column
+        self._time = np.empty(self.capacity, dtype=np.float64)
+        self._data = {x: np.empty(self.capacity, dtype=self.dtypes[x]) for x in self.columns}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, column: str):
+        """
+        Gets view of stored values of a column.
+
+        :param column: Name of column
+        :return: NumPy array view of column
+        """
+        return self._data[column][:self.count]
+
+    @property
+    def time(self):
+        """
+        View of stored sample times.
+        """
+        return self._time[:self.count]
+
+    def extend(self, times, rows):
+        """
+        Appends samples to store.
+
+        :param times: Array-like of sample times with length n
+        :param rows: Array-like of shape (n, columns) with values in the same order as self.columns
+        """
+        times = np.asarray(times, dtype=np.float64)
+        rows = np.asarray(rows).reshape(len(times), len(self.columns))
+        count = self.count + len(times)
+
+        # Grows arrays by whole chunks if they are full
+        if count > self.capacity:
+            self.capacity = -(-count // self.chunk_size) * self.chunk_size
+            self._time = self._resize(self._time)
+            self._data = {x: self._resize(self._data[x]) for x in self.columns}
+
+        # Writes samples to end of arrays
+        self._time[self.count:count] = times
+        for i, column in enumerate(self.columns):
+            self._data[column][self.count:count] = rows[:, i]
+
+        self.count = count
+
+    def rows(self, start=0, end=None):
+        """
+        Gets stored values of every column as rows. Copies values.
+
+        :param start: Index of first row
+        :param end: Index after last row. Defaults to number of rows stored.
+        :return: NumPy array of shape (rows, columns)
+        """
+        end = self.count if end is None else min(end, self.count)
+
+        # Stacks columns into rows
+        rows = np.empty((max(end - start, 0), len(self.columns)))
+        for i, column in enumerate(self.columns):
+            rows[:, i] = self._data[column][start:end]
+
+        return rows
+
+    def _resize(self, array):
+        """
+        Copies stored values of array into a new array of self.capacity rows.
+        """
+        resized = np.empty(self.capacity, dtype=array.dtype)
+        resized[:self.count] = array[:self.count]
+        return resized
+
+
+class WindowLimits:
+
+    def __init__(self):
+        """
+        Tracks the limits of a data set that only grows by appending points.
+        Points are read once when appended. y maximum and minimum are kept in monotonic deques, so they can be found
+        for a sliding x-window without scanning the data, at an amortized O(1) cost per point.
+        """
+
+        # Number of points read from data set
+        self.count = 0
+
+        # x limits of all points. Data is sorted by x, so these are the first and last points.
+        self.x_minimum = None
+        self.x_maximum = None
+
+        # Deques of (x, y) points in the window, with y decreasing in self.maximums and increasing in self.minimums
+        self.maximums = deque()
+        self.minimums = deque()
+
+    @property
+    def y_maximum(self):
+        return self.maximums[0][1] if self.maximums else None
+
+    @property
+    def y_minimum(self):
+        return self.minimums[0][1] if self.minimums else None
+
+    def update(self, x, y):
+        """
+        Reads points appended to data set since last update. If the data set got shorter it was replaced, so it is
+        read again from the start.
+
+        :param x: x data sorted in ascending order as a list or NumPy array
+        :param y: y data as a list or NumPy array
+        """
+
+        # Starts over if data set was replaced
+        if len(x) < self.count:
+            self.__init__()
+
+        if len(x) == self.count:
+            return
+
+        for x_value, y_value in zip(x[self.count:], y[self.count:]):
+
+            # Skips NaN values
+            if y_value != y_value:
+                continue
+
+            # Removes points that can no longer be the maximum or minimum
+            while self.maximums and self.maximums[-1][1] <= y_value:
+                self.maximums.pop()
+            while self.minimums and self.minimums[-1][1] >= y_value:
+                self.minimums.pop()
+
+            self.maximums.append((x_value, y_value))
+            self.minimums.append((x_value, y_value))
+
+        # Updates x limits
+        if self.count == 0:
+            self.x_minimum = x[0]
+        self.x_maximum = x[-1]
+
+        self.count = len(x)
+
+    def evict(self, x_minimum):
+        """
+        Removes points left of the window so they no longer affect y limits. Window can only move right.
+
+        :param x_minimum: Left edge of window
+        """
+        while self.maximums and self.maximums[0][0] < x_minimum:
+            self.maximums.popleft()
+        while self.minimums and self.minimums[0][0] < x_minimum:
+            self.minimums.popleft()
+
+
+class Plot(Frame):
+
+    def __init__(self, master: Frame | Tk, plot_title="", x_label="", y_label="", data: tuple | list | int = 0, auto_fit=True, follow=120, buffer=3, x_lim: tuple = (0, 1), y_lim: tuple = (0, 1), figure_size=(4, 4), dpi=100, blit=False, blit_step=None, downsample=True):
+        """
+            Class for plotting data in tkinter.
+            Designed to handle continuous data feed.
+            Will automatically follow data on x-axis by showing most recent 120 points.
+            Plot will automatically scale to fit data on y-axis.
+            A buffer between the y-axis endpoints is automatically created at ± 3 units.
+
+            Data to be fed into this class should be formatted as follows:
+
+                x = [1, 2, 3, 4, 5]
+                y = [1, 2, 3, 4, 5]
+                label = "Data"
+
+                data = (x, y, label)
+
+                plot = Plot(root, data)
+
+            OR - For multiple sets of data
+
+                x = [1, 2, 3, 4, 5]
+                y = [1, 2, 3, 4, 5]
+                label = "Data1"
+
+                data1 = (x, y, label)
+
+                z = [1, 2, 3, 4, 5]
+                w = [1, 2, 3, 4, 5]
+                label2 = "Data2"
+
+                data2 = (z, w, label2)
+
+                data = [data1, data2]
+
+                plot = Plot(root, data)
+
+            Data can also be added after initialization as follows:
+
+                plot = Plot(Frame)
+                plot.update_data(data)
+
+            It is recommended to make a separate frame for the Plot class as follows:
+
+                plot_frame = Frame(master)
+                plot_frame.pack()
+                plot = Plot(plot_frame)
+
+
+            :param master: Frame or Tk to place plot on
+            :param data: Data to plot as either a tuple or list. Refer to documentation for formatting. Can be initialized after Plot using Plot.update_data(data)
+
+            :param plot_title: Title to be shown on plot - Optional
+            :param x_label: abel for x-axis - Optional
+            :param y_label: Label for y-axis - Optional
+            :param auto_fit: True by default. Will automatically scale plot to fit data. - Optional
+            :param follow: Amount to follow x-axis right limit by. Set to 0 to turn off. - Optional
+            :param buffer: Padding on y-axis from max and min values. - Optional
+            :param x_lim: X-axis limits. A tuple with the format: (min, max) - Optional
+            :param y_lim: Y-axis limits. A tuple with the format: (min, max) - Optional
+            :param figure_size: Size of plot. A tuple with the format: (horizontal_length, vertical_length) - Optional
+            :param dpi: Resolution of the plot. - Optional
+            :param blit: Only redraws lines and legend on update, reusing a cached background of the axes. The background is only redrawn when axis limits change. - Optional
+            :param blit_step: Step the x-axis right limit moves by when following data in blit mode, so the background is not redrawn every update. Defaults to follow / 12. - Optional
+            :param downsample: Only plots data inside the x-axis limits, reduced to a minimum and maximum per pixel column. Data must be sorted by x. - Optional
+            """
+        super().__init__(master)
+
+        # Makes frame to hold plot
+        self.main_frame = Frame(master, background='white')
+        self.main_frame.pack()
+
+        # Style for plots to use
+        style.use('seaborn')
+
+        # Initializes parameters for use throughout class
+        self.auto_fit = auto_fit
+        self.follow = follow
+        self.buffer = buffer
+        self.blit = blit
+        self.blit_step = blit_step if blit_step is not None else follow / 12
+        self.downsample = downsample
+
+        # Initializes cached background and the axis limits it was drawn with for blit mode
+        self.background = None
+        self.limits = None
+
+        # Initializes figure
+        self.figure = figure.Figure(figure_size, dpi=dpi)
+
+        # Initializes plot
+        self.main_plot = self.figure.add_subplot(111)
+
+        # Saves title and axis labels and adds
+        self.title = plot_title
+        self.x_label = x_label
+        self.y_label = y_label
+        self.main_plot.set_title(plot_title)
+        self.main_plot.set_xlabel(x_label)
+        self.main_plot.set_ylabel(y_label)
+
+        # If auto_size is true and data is not empty
+        if auto_fit and data != 0:
+
+            # Gets axis limits for data
+            limits = self.get_data_limits(data)
+
+            if self.follow == 0:
+
+                # Sets axis limits
+                self.main_plot.set_xlim(limits[1], limits[0])
+                self.main_plot.set_ylim(limits[3] - self.buffer, limits[2] + self.buffer)
+
+            else:
+
+                # Sets axis limits
+                self.main_plot.set_xlim(limits[0] - self.follow, limits[0])
+                self.main_plot.set_ylim(limits[3] - self.buffer, limits[2] + self.buffer)
+
+        else:
+
+            # Sets axis limits
+            self.main_plot.set_xlim(x_lim[0], x_lim[1])
+            self.main_plot.set_ylim(y_lim[0], y_lim[1])
+
+        # Initializes lines and their labels. Lines are created once and reused by update_data().
+        self.lines = []
+        self.labels = []
+
+        # Initializes axis limit trackers for each line
+        self.trackers = []
+
+        # Plots data
+        if type(data) is tuple:
+
+            # Plots single set of data
+            self.lines = self.main_plot.plot(data[0], data[1], label=data[2])
+            self.labels = [data[2]]
+
+            # Initializes legend in lower right corner
+            self.legend = self.main_plot.legend(loc='lower left')
+            self.legend.set_animated(self.blit)
+
+        # If data is a list of tuples
+        if type(data) is list:
+
+            # Plots multiple sets of data
+            for i in data:
+                self.lines += self.main_plot.plot(i[0], i[1], label=i[2])
+                self.labels.append(i[2])
+
+            # Initializes legend in lower right corner
+            self.legend = self.main_plot.legend(loc='lower left')
+            self.legend.set_animated(self.blit)
+
+        # Lines are drawn separately from background in blit mode
+        for line in self.lines:
+            line.set_animated(self.blit)
+
+
+        # Draws figure
+        self.canvas = backend_tkagg.FigureCanvasTkAgg(self.figure, master=self.main_frame)  # A tk.DrawingArea.
+
+        # Caches background every time the whole figure is drawn, including when the window is resized
+        if self.blit:
+            self.canvas.mpl_connect('draw_event', self.on_draw)
+
+        self.canvas.draw()
+        self.canvas.get_tk_widget().pack(ipadx=20)
+
+    def clear(self):
+        """
+        Clears plot data without removing title and axes
+        """
+        # Clears plot data
+        self.main_plot.clear()
+
+        # Lines were removed with plot data, so they are recreated on next update
+        self.lines = []
+        self.labels = []
+        self.trackers = []
+
+        # Reinitialize title and axis labels
+        self.main_plot.set_title(self.title)
+        self.main_plot.set_xlabel(self.x_label)
+        self.main_plot.set_ylabel(self.y_label)
+
+    def update_data(self, data, x_lim=(0, 1), y_lim=(0, 1)):
+        """
+        Updates plot with new data. Lines are reused between updates and only recreated if the number of data sets
+        changes. Legend is only rebuilt when the number of data sets changes, otherwise only its text is updated.
+
+        :param data: Either tuple or list of tuples in correct format - refer to Plot __init__ documentation.
+        :param x_lim: X-axis limits used if auto_fit is off. A tuple with the format: (min, max)
+        :param y_lim: Y-axis limits used if auto_fit is off. A tuple with the format: (min, max)
+        """
+
+        # Formats data as a list of sets
+        data_sets = [data] if type(data) is tuple else data
+
+        # Recreates lines if number of data sets changed
+        if len(data_sets) != len(self.lines):
+
+            # Removes previous lines
+            for line in self.lines:
+                line.remove()
+
+            # Creates empty line for each set of data
+            self.lines = [self.main_plot.plot([], [], animated=self.blit)[0] for _ in data_sets]
+            self.labels = []
+
+        # Recreates limit trackers if number of data sets changed
+        if len(data_sets) != len(self.trackers):
+            self.trackers = [WindowLimits() for _ in data_sets]
+
+        # If auto_fit is true
+        if self.auto_fit:
+
+            # Adds points appended since last update to limit trackers
+            for tracker, data_set in zip(self.trackers, data_sets):
+                tracker.update(data_set[0], data_set[1])
+
+            # Only data sets with points affect limits
+            trackers = [x for x in self.trackers if x.count > 0]
+
+            # Gets axis limits for data
+            if trackers:
+                x_minimum = min(x.x_minimum for x in trackers)
+                x_maximum = max(x.x_maximum for x in trackers)
+
+                # In blit mode, moves x-axis right limit in steps so the background is only redrawn once per step
+                if self.blit and self.blit_step > 0:
+                    x_maximum = np.ceil(x_maximum / self.blit_step) * self.blit_step
+
+                # Is follow is on, only fits y-axis to data that can be seen
+                if self.follow != 0:
+                    x_minimum = x_maximum - self.follow
+
+                    for tracker in trackers:
+                        tracker.evict(x_minimum)
+
+                # Sets axis limits
+                self.main_plot.set_xlim(x_minimum, x_maximum)
+
+                # Sets y-axis limits if any points can be seen
+                trackers = [x for x in trackers if x.y_minimum is not None]
+                if trackers:
+                    y_minimum = min(x.y_minimum for x in trackers)
+                    y_maximum = max(x.y_maximum for x in trackers)
+                    self.main_plot.set_ylim(y_minimum - self.buffer, y_maximum + self.buffer)
+
+        # If auto_fit is not true use method parameters
+        else:
+
+            # Sets axis limits
+            self.main_plot.set_xlim(x_lim[0], x_lim[1])
+            self.main_plot.set_ylim(y_lim[0], y_lim[1])
+
+        # Gets x-axis limits and width of plot in pixels for downsampling
+        x_minimum, x_maximum = self.main_plot.get_xlim()
+        width = max(int(self.main_plot.bbox.width), 1)
+
+        # Updates data of each line
+        for line, data_set in zip(self.lines, data_sets):
+
+            # Reduces data to what can be seen on plot
+            if self.downsample:
+                line.set_data(*self.downsample_data(data_set[0], data_set[1], x_minimum, x_maximum, width))
+            else:
+                line.set_data(data_set[0], data_set[1])
+
+        # Gets labels for each line
+        labels = [data_set[2] for data_set in data_sets]
+
+        # Updates legend if labels have changed
+        if labels != self.labels:
+
+            # Updates line labels
+            for line, label in zip(self.lines, labels):
+                line.set_label(label)
+
+            # Only changes legend text if legend already has an entry for each line
+            if len(labels) == len(self.labels):
+                for text, label in zip(self.legend.get_texts(), labels):
+                    text.set_text(label)
+
+            # Initializes legend in lower right corner
+            else:
+                self.legend = self.main_plot.legend(loc='lower left')
+                self.legend.set_animated(self.blit)
+
+            self.labels = labels
+
+        # Applies changes
+        if self.blit:
+            self.blit_update()
+        else:
+            # Redraws next time Tk is idle
+            self.canvas.draw_idle()
+
+    @staticmethod
+    def downsample_data(x, y, x_minimum, x_maximum, buckets):
+        """
+        Function to reduce data to the points that affect how it looks on a plot.
+        Data is sliced to the x-axis limits, then split into buckets and reduced to the minimum and maximum of each
+        bucket. Slicing uses a binary search, so cost depends on the points inside the limits and not the total length.
+
+        :param x: x data sorted in ascending order as a list or NumPy array
+        :param y: y data as a list or NumPy array
+        :param x_minimum: Left x-axis limit
+        :param x_maximum: Right x-axis limit
+        :param buckets: Number of buckets. Use width of plot in pixels.
+        :return: Tuple of NumPy arrays of the form: (x, y)
+        """
+
+        # Finds visible range with a binary search
+        if type(x) is np.ndarray:
+            start = int(np.searchsorted(x, x_minimum, side='left'))
+            end = int(np.searchsorted(x, x_maximum, side='right'))
+        else:
+            start = bisect.bisect_left(x, x_minimum)
+            end = bisect.bisect_right(x, x_maximum)
+
+        # Keeps one point past either limit so lines reach the plot edges
+        start = max(start - 1, 0)
+        end = min(end + 1, len(x))
+
+        # Slices data to visible range
+        x = np.asarray(x[start:end], dtype=float)
+        y = np.asarray(y[start:end], dtype=float)
+
+        # No need to reduce data if it already fits
+        if len(x) <= 2 * buckets:
+            return x, y
+
+        # Splits data into buckets with the same number of points. Leftover points at the end are kept as is.
+        bucket_size = len(x) // buckets
+        bucketed_count = bucket_size * buckets
+        y_buckets = y[:bucketed_count].reshape(buckets, bucket_size)
+
+        # Gets indices of minimum and maximum in each bucket
+        offsets = np.arange(buckets) * bucket_size
+        minimum_indices = np.argmin(y_buckets, axis=1) + offsets
+        maximum_indices = np.argmax(y_buckets, axis=1) + offsets
+
+        # Combines indices in order so line is drawn through minimum and maximum in the order they occurred
+        indices = np.unique(np.concatenate((minimum_indices, maximum_indices, np.arange(bucketed_count, len(x)))))
+
+        return x[indices], y[indices]
+
+    def blit_update(self):
+        """
+        Redraws lines and legend over the cached background. Redraws the whole figure instead if there is no cached
+        background yet or if the axis limits have changed since it was drawn.
+        """
+
+        # Gets current axis limits
+        limits = (self.main_plot.get_xlim(), self.main_plot.get_ylim())
+
+        # Redraws whole figure, which caches a new background through on_draw()
+        if self.background is None or limits != self.limits:
+            self.canvas.draw()
+            return
+
+        # Restores background and draws lines and legend over it
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.figure.bbox)
+
+    def on_draw(self, event):
+        """
+        Caches background after the whole figure is drawn, then draws lines and legend over it.
+
+        :param event: Matplotlib draw event
+        """
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.limits = (self.main_plot.get_xlim(), self.main_plot.get_ylim())
+        self.draw_animated()
+
+    def draw_animated(self):
+        """
+        Draws lines and legend, which are left out of the cached background in blit mode.
+        """
+        for line in self.lines:
+            self.main_plot.draw_artist(line)
+
+        if self.lines:
+            self.main_plot.draw_artist(self.legend)
+
+    @staticmethod
+    def get_data_limits(data):
+        """
+        Function to get max and min from data
+
+        :param data: Either tuple or list of tuples in correct format - refer to Plot __init__ documentation.
+        :return: Max and min for both x and y in data in the tuple format: (x_maximum, x_minimum, y_maximum, y_minimum)
+        """
+
+        # If data is a single set
+        if type(data) == tuple:
+            return np.max(data[0]), np.min(data[0]), np.max(data[1]), np.min(data[1])
+
+        # If data is multiple sets
+        if type(data) == list:
+
+            # Initialize max and min values
+            x_maximum = -10**10
+            x_minimum = 10**10
+            y_maximum = -10 ** 10
+            y_minimum = 10 ** 10
+
+            # Checks for max and min in each set and updates overall max and min
+            for x in data:
+
+                if np.max(x[0]) > x_maximum:
+                    x_maximum = np.max(x[0])
+                if np.min(x[0]) < x_minimum:
+                    x_minimum = np.min(x[0])
+
+                if np.max(x[1]) > y_maximum:
+                    y_maximum = np.max(x[1])
+                if np.min(x[1]) < y_minimum:
+                    y_minimum = np.min(x[1])
+
+            return x_maximum, x_minimum, y_maximum, y_minimum
+
+
+class Calibration:
+
+    # Kinds of calibration curve
+    kinds = ('linear', 'polynomial', 'piecewise')
+
+    def __init__(self, kind: str, coefficients=None, x=None, y=None):
+        """
+        Calibration curve that converts raw values, i.e. volts, to engineering units.
+        Linear and polynomial curves are coefficients of a polynomial, highest power first, as returned by np.polyfit().
+        Piecewise curves interpolate linearly between points, and hold the value of the nearest end point outside them.
+        Curves are usually fitted to measured points with Calibration.fit() or Calibration.from_excel().
+        To convert many channels at once, compile their curves into a CalibrationSet.
+
+        :param kind: Kind of curve, one of Calibration.kinds
+        :param coefficients: Coefficients of linear or polynomial curve, highest power first, i.e. (slope, intercept)
+        :param x: Raw values of points of piecewise curve
+        :param y: Converted values of points of piecewise curve
+        """
+        if kind not in self.kinds:
+            raise ValueError("Calibration kind must be one of: " + ", ".join(self.kinds))
+        self.kind = kind
+
+        if kind == 'piecewise':
+
+            # Sorts points by raw value, as required by np.interp
+            x = np.asarray(x, dtype=np.float64)
+            y = np.asarray(y, dtype=np.float64)
+            if len(x) < 2 or len(x) != len(y):
+                raise ValueError("Piecewise calibration needs at least two points with both x and y values")
+            order = np.argsort(x)
+            self.x = x[order]
+            self.y = y[order]
+            self.coefficients = None
+
+        else:
+            self.coefficients = np.atleast_1d(np.asarray(coefficients, dtype=np.float64))
+            if kind == 'linear' and len(self.coefficients) != 2:
+                raise ValueError("Linear calibration needs a slope and an intercept")
+            self.x = self.y = None
+
+    def __call__(self, values):
+        """
+        Converts values with curve.
+
+        :param values: Raw value or array of raw values
+        :return: Converted values as a NumPy array
+        """
+        if self.kind == 'piecewise':
+            return np.interp(values, self.x, self.y)
+        return np.polyval(self.coefficients, values)
+
+    @staticmethod
+    def fit(x, y, kind='linear', degree=2):
+        """
+        Fits curve to measured points.
+
+        :param x: Raw values of points
+        :param y: Converted values of points
+        :param kind: Kind of curve, one of Calibration.kinds
+        :param degree: Degree of polynomial curves
+        :return: Calibration
+        """
+        if kind == 'piecewise':
+
+            # Averages repeated measurements of the same raw value so points are unique
+            points = pd.DataFrame({'x': x, 'y': y}).groupby('x')['y'].mean()
+            return Calibration(kind, x=points.index.to_numpy(), y=points.to_numpy())
+
+        return Calibration(kind, np.polyfit(x, y, 1 if kind == 'linear' else degree))
+
+    @staticmethod
+    def from_excel(path: str, sheet_name: str, x_column: str, y_column: str, kind='linear', degree=2):
+        """
+        Fits curve to points in a calibration spreadsheet, i.e. those in the calibrations directory.
+        Rows without numbers in both columns, such as notes or repeated headers, are ignored.
+
+        :param path: Path of spreadsheet
+        :param sheet_name: Name of sheet with points
+        :param x_column: Header of column of raw values, i.e. "Pump Voltage Input (V)"
+        :param y_column: Header of column of converted values
+        :param kind: Kind of curve, one of Calibration.kinds
+        :param degree: Degree of polynomial curves
+        :return: Calibration
+        """
+        points = pd.read_excel(path, sheet_name=sheet_name, usecols=[x_column, y_column])
+        points = points.apply(pd.to_numeric, errors='coerce').dropna()
+        return Calibration.fit(points[x_column].to_numpy(), points[y_column].to_numpy(), kind, degree)
+
+    @staticmethod
+    def from_dict(calibration: dict):
+        """
+        Gets curve from a dict made by Calibration.to_dict().
+
+        :param calibration: Dict of curve
+        :return: Calibration
+        """
+        return Calibration(calibration['kind'], calibration.get('coefficients'), calibration.get('x'), calibration.get('y'))
+
+    def to_dict(self):
+        """
+        Gets curve as a dict of lists, i.e. for saving to session file metadata.
+
+        :return: Dict of the form: {'kind': kind, 'coefficients': [...]} or {'kind': kind, 'x': [...], 'y': [...]}
+        """
+        if self.kind == 'piecewise':
+            return {'kind': self.kind, 'x': self.x.tolist(), 'y': self.y.tolist()}
+        return {'kind': self.kind, 'coefficients': self.coefficients.tolist()}
+
+
+class CalibrationSet:
+
+    def __init__(self, calibrations: list):
+        """
+        Calibrations of a group of channels compiled into NumPy arrays, so a block of samples of every channel is
+        converted at once instead of value by value.
+        Linear and polynomial curves are padded to the same degree and evaluated together. Piecewise curves are
+        interpolated a channel at a time, as each has its own points.
+
+        :param calibrations: Calibration of each channel, in column order. None leaves a channel's values unchanged.
+        """
+        self.calibrations = [x if x is not None else Calibration('linear', (1, 0)) for x in calibrations]
+
+        # Indexes of channels with piecewise curves
+        self.piecewise = [i for i, x in enumerate(self.calibrations) if x.kind == 'piecewise']
+
+        # Coefficients of polynomial curves of shape (degree + 1, channels), highest power first.
+        # Channels with piecewise curves are left at zero and filled in by apply().
+        polynomials = [x.coefficients for x in self.calibrations if x.kind != 'piecewise']
+        terms = max([len(x) for x in polynomials], default=1)
+        self.coefficients = np.zeros((terms, len(self.calibrations)))
+        for i, calibration in enumerate(self.calibrations):
+            if calibration.kind != 'piecewise':
+                self.coefficients[terms - len(calibration.coefficients):, i] = calibration.coefficients
+
+    def __len__(self):
+        return len(self.calibrations)
+
+    def apply(self, values):
+        """
+        Converts block of samples of every channel.
+
+        :param values: Array of raw values of shape (samples, channels)
+        :return: Array of converted values of shape (samples, channels)
+        """
+        values = np.asarray(values, dtype=np.float64)
+
+        # Evaluates polynomials of all channels with Horner's method, one term at a time
+        result = np.broadcast_to(self.coefficients[0], values.shape).copy()
+        for coefficients in self.coefficients[1:]:
+            result *= values
+            result += coefficients
+
+        for i in self.piecewise:
+            result[:, i] = self.calibrations[i](values[:, i])
+
+        return result
+
+
+class CalibrationCache:
+
+    # Identifies calibration cache files
+    MAGIC = b'MCCDAQC1'
+
+    def __init__(self, path: str):
+        """
+        Cache of calibrations fitted to spreadsheets, so launches where no spreadsheet changed skip parsing them.
+        Each calibration is keyed by its spreadsheet, sheet, columns, and curve, and is reused while the spreadsheet's
+        modification time and size are unchanged. If they changed, the SHA-256 hash of the spreadsheet is compared, so
+        a file that was saved or copied without its contents changing isn't parsed again.
+
+        The file holds the magic, length and CRC32 of the data, then zlib compressed JSON of the entries.
+        A missing or corrupt file is treated as empty. Changes are written by save().
+
+        :param path: Path of cache file
+        """
+        self.path = path
+
+        # Entries of the form: {key: {'mtime_ns': ..., 'size': ..., 'hash': ..., 'calibration': Calibration.to_dict()}}
+        self.entries = {}
+        self.changed = False
+
+        # Number of calibrations loaded from cache and fitted to spreadsheets
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            with open(path, 'rb') as file:
+                self.entries = CalibrationCache.unpack(file.read())
+        except FileNotFoundError:
+            pass
+
+        # If any other error occurs, rebuilds cache
+        except Exception as e:
+            print("Calibration cache could not be read, rebuilding it: " + repr(e))
+
+    @staticmethod
+    def pack(entries: dict):
+        """
+        Packs entries as: magic, data length, CRC32 of data, zlib compressed JSON of entries.
+        """
+        data = zlib.compress(json.dumps(entries).encode('utf-8'))
+        return CalibrationCache.MAGIC + struct.pack('<II', len(data), zlib.crc32(data)) + data
+
+    @staticmethod
+    def unpack(file_data: bytes):
+        """
+        Unpacks entries packed by CalibrationCache.pack().
+        """
+        if file_data[:len(CalibrationCache.MAGIC)] != CalibrationCache.MAGIC:
+            raise ValueError("Not a calibration cache file.")
+
+        offset = len(CalibrationCache.MAGIC)
+        length, crc = struct.unpack('<II', file_data[offset:offset + 8])
+        data = file_data[offset + 8:offset + 8 + length]
+        if len(data) != length or zlib.crc32(data) != crc:
+            raise ValueError("Calibration cache file is corrupt.")
+
+        return json.loads(zlib.decompress(data).decode('utf-8'))
+
+    @staticmethod
+    def file_hash(path: str):
+        """
+        Gets SHA-256 hash of a file as a hex string.
+        """
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+
+    def from_excel(self, path: str, sheet_name: str, x_column: str, y_column: str, kind='linear', degree=2):
+        """
+        Gets calibration fitted to a spreadsheet from the cache, or fits and caches it if the spreadsheet changed.
+        Arguments are the same as Calibration.from_excel().
+
+        :return: Calibration
+        """
+        key = json.dumps([os.path.normpath(path), sheet_name, x_column, y_column, kind, degree])
+        stat = os.stat(path)
+        entry = self.entries.get(key)
+
+        # Checks contents of spreadsheet if it was modified since it was cached
+        if entry is not None and (entry['mtime_ns'], entry['size']) != (stat.st_mtime_ns, stat.st_size):
+            file_hash = CalibrationCache.file_hash(path)
+            if entry['hash'] == file_hash:
+                entry.update({'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size})
+                self.changed = True
+            else:
+                entry = None
+
+        if entry is not None:
+            self.hits += 1
+            return Calibration.from_dict(entry['calibration'])
+
+        # Hashes spreadsheet before fitting, so a change made while fitting is picked up next launch
+        file_hash = CalibrationCache.file_hash(path)
+        calibration = Calibration.from_excel(path, sheet_name, x_column, y_column, kind, degree)
+        self.entries[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'hash': file_hash,
+                             'calibration': calibration.to_dict()}
+        self.changed = True
+        self.misses += 1
+
+        return calibration
+
+    def save(self):
+        """
+        Writes cache to file if it changed. File is replaced in one step, so a crash can't leave it half written.
+        """
+        if not self.changed:
+            return
+
+        with open(self.path + '.tmp', 'wb') as file:
+            file.write(CalibrationCache.pack(self.entries))
+        os.replace(self.path + '.tmp', self.path)
+        self.changed = False
+
+
+class DataHandler:
+    """
+    Class for handling application data.
+    """
+
+    # Number of rows written at a time by formats that write in chunks
+    chunk_size = 100000
+
+    # Most rows in an Excel sheet, including header
+    excel_row_limit = 1048576
+
+    # Number of rows at each end of a column looked at to find its precision or width
+    autofit_sample_size = 1000
+
+    # Number of rows written to estimate size of a row in each format, for splitting files by size
+    size_sample_rows = 10000
+
+    # Largest number of decimal places found when auto-fitting columns
+    autofit_max_decimals = 10
+
+    @staticmethod
+    def export(data: pd.DataFrame, output_directory_path: str, filename: str, sheet_name="Sheet1", file_format=".xlsx",
+               max_size=None, max_duration=None, split_sheets=True):
+        """
+        Method to export pandas dataframe to a file. Compatible with single dataframe.
+        Formats are listed in DataHandler.formats. Excel files have auto-fit columns.
+        If data is split across files or sheets, files are numbered, i.e. "MCC-DAQ Data_0001.xlsx", and an index file
+        "MCC-DAQ Data_index.csv" lists the rows and time range of each part.
+        :param data: Data as a pandas DataFrame
+        :param output_directory_path: Path to export file to
+        :param filename: Name of file
+        :param sheet_name: Name of sheet for Excel files
+        :param file_format: File extension of format to export as
+        :param max_size: Size in MB to start a new file after, estimated with DataHandler.row_size(). None for no limit.
+        :param max_duration: Time in seconds to start a new file after, using the first column. None for no limit.
+        :param split_sheets: If True, Excel files with too many rows for a sheet are split across sheets, otherwise files
+        :return: Path data was saved to, or path of index file if data was split
+        """
+
+        # Starts timer for export
+        start = time.perf_counter_ns()
+
+        # Gets rows of each file
+        parts = DataHandler.split_rows(data, file_format, max_size, max_duration, split_sheets)
+
+        # Formats path if necessary
+        if output_directory_path[-1] != '/':
+            output_directory_path += '/'
+
+        # Try to write data to given filename
+        try:
+
+            # Checks if directory exists or not then makes it
+            if not os.path.exists(output_directory_path):
+                os.makedirs(output_directory_path)
+
+            # Writes data
+            path = DataHandler.write_parts(data, parts, output_directory_path, filename, sheet_name, file_format)
+
+        # Missing libraries for a format are not fixed by writing somewhere else
+        except ImportError:
+            raise
+
+        # If any other error occurs, write file labelled "temp" instead to project directory
+        except Exception as e:
+
+            # Outputs error
+            print(e)
+
+            # Writes data
+            path = DataHandler.write_parts(data, parts, "./MCC-DAQ backup/", "temp", sheet_name, file_format)
+
+        # Outputs path to terminal
+        print('Data saved to: ' + path)
+
+        Timings.add('DataHandler.export ' + file_format, (time.perf_counter_ns() - start) / 1e6)
+
+        return path
+
+    @staticmethod
+    def align(data: list):
+        """
+        Joins data sampled at different rates into one table on their first column, which is time.
+        Every row of every data is kept, sorted by time. Rows of different data at exactly the same time are joined,
+        and values missing from a row are left empty. Empty data only adds its columns.
+
+        :param data: List of pandas DataFrames, each with time as its first column
+        :return: Data as a pandas DataFrame, with columns in the order given
+        """
+
+        # Renames time column of all data to match the first
+        time_column = data[0].columns[0]
+        data = [x.rename(columns={x.columns[0]: time_column}) for x in data]
+        columns = [time_column] + [column for x in data for column in x.columns[1:]]
+
+        # Skips empty data, as its columns have no type to join on
+        data = [x for x in data if len(x) > 0]
+        if not data:
+            return pd.DataFrame(columns=columns, dtype=np.float64)
+
+        # Stacks rows of all data, then joins rows at the same time. Each group keeps its first value at that time.
+        aligned = pd.concat(data, ignore_index=True).groupby(time_column, sort=True, as_index=False).first()
+
+        # Puts columns back in order given, adding columns of empty data
+        return aligned.reindex(columns=columns)
+
+    @staticmethod
+    def split_rows(data: pd.DataFrame, file_format=".xlsx", max_size=None, max_duration=None, split_sheets=True):
+        """
+        Finds rows of data written to each file.
+
+        :param data: Data as a pandas DataFrame, with time as its first column
+        :param file_format: File extension of format to export as
+        :param max_size: Size in MB to start a new file after, estimated with DataHandler.row_size(). None for no limit.
+        :param max_duration: Time in seconds to start a new file after. None for no limit.
+        :param split_sheets: If False, Excel files are limited to the rows of one sheet
+        :return: List of tuples of the form: (first row, end row)
+        """
+
+        # Gets most rows in a file
+        max_rows = len(data)
+        if max_size and len(data):
+            max_rows = max(int(max_size * 2 ** 20 // DataHandler.row_size(data, file_format)), 1)
+        if file_format == ".xlsx" and not split_sheets:
+            max_rows = min(max_rows, DataHandler.excel_row_limit - 1)
+
+        # Gets times, which are searched for the end of each file
+        if max_duration:
+            times = data.iloc[:, 0].to_numpy(dtype=float)
+
+        # Initialize list for rows of each file
+        parts = []
+
+        start = 0
+        while start < len(data):
+            end = min(start + max_rows, len(data))
+            if max_duration:
+                end = max(min(end, int(np.searchsorted(times, times[start] + max_duration, 'left'))), start + 1)
+            parts.append((start, end))
+            start = end
+
+        # Empty data is still written to a file
+        return parts or [(0, 0)]
+
+    @staticmethod
+    def row_size(data: pd.DataFrame, file_format=".xlsx"):
+        """
+        Estimates size of a row of data in a file of a format, as compression makes it differ from size in memory.
+        Up to DataHandler.size_sample_rows rows from the middle of data are written to a temporary file with the
+        format's write function and measured.
+
+        :param data: Data as a pandas DataFrame
+        :param file_format: File extension of format
+        :return: Size of a row in bytes
+        """
+        start = max((len(data) - DataHandler.size_sample_rows) // 2, 0)
+        sample = data.iloc[start:start + DataHandler.size_sample_rows].reset_index(drop=True)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sample' + file_format)
+            with Timings.span('DataHandler.row_size ' + file_format):
+                DataHandler.formats[file_format][1](sample, path)
+            return os.path.getsize(path) / max(len(sample), 1)
+
+    @staticmethod
+    def split_sheets(rows: int, sheet_name="Sheet1"):
+        """
+        Finds rows written to each sheet of an Excel file. Sheets are numbered if there is more than one.
+
+        :param rows: Number of rows in file
+        :param sheet_name: Name of sheet
+        :return: List of tuples of the form: (sheet name, first row, end row)
+        """
+
+        # Rows in a sheet, excluding header
+        sheet_rows = DataHandler.excel_row_limit - 1
+
+        if rows <= sheet_rows:
+            return [(sheet_name, 0, rows)]
+
+        return [(f"{sheet_name}_{i + 1:04d}", start, min(start + sheet_rows, rows))
+                for i, start in enumerate(range(0, rows, sheet_rows))]
+
+    @staticmethod
+    def write_parts(data: pd.DataFrame, parts: list, output_directory_path: str, filename: str, sheet_name="Sheet1",
+                    file_format=".xlsx"):
+        """
+        Writes data to a file for each part, and an index file if data was split.
+
+        :param data: Data as a pandas DataFrame
+        :param parts: Rows of each file from DataHandler.split_rows()
+        :param output_directory_path: Path to export files to, ending in "/"
+        :param filename: Name of file
+        :param sheet_name: Name of sheet for Excel files
+        :param file_format: File extension of format to export as
+        :return: Path data was saved to, or path of index file if data was split
+        """
+
+        # Gets method that writes format
+        write = DataHandler.formats[file_format][1]
+
+        # Data in one file is written as before
+        if len(parts) == 1:
+            path = output_directory_path + filename + file_format
+            write(data, path, sheet_name)
+            if file_format != ".xlsx" or len(DataHandler.split_sheets(len(data), sheet_name)) == 1:
+                return path
+
+        # Otherwise each part is numbered
+        else:
+            for i, (start, end) in enumerate(parts):
+                path = output_directory_path + f"{filename}_{i + 1:04d}" + file_format
+                write(data.iloc[start:end].reset_index(drop=True), path, sheet_name)
+
+        # Initialize list for rows of index
+        index = []
+
+        # Adds row for each file, or each sheet of Excel files
+        times = data.iloc[:, 0].to_numpy()
+        for i, (start, end) in enumerate(parts):
+            part_filename = (filename if len(parts) == 1 else f"{filename}_{i + 1:04d}") + file_format
+            if file_format == ".xlsx":
+                sheets = DataHandler.split_sheets(end - start, sheet_name)
+            else:
+                sheets = [("", 0, end - start)]
+            for sheet, sheet_start, sheet_end in sheets:
+                first, last = start + sheet_start, start + sheet_end
+                index.append([part_filename, sheet, first, last - first,
+                              times[first] if last > first else np.nan, times[last - 1] if last > first else np.nan])
+
+        # Writes index
+        path = output_directory_path + filename + "_index.csv"
+        pd.DataFrame(index, columns=['File', 'Sheet', 'First Row', 'Rows', 'Start Time (s)', 'End Time (s)']) \
+            .to_csv(path, index=False, encoding='utf-8-sig')
+
+        return path
+
+    @staticmethod
+    def register_format(file_format: str, name: str, write):
+        """
+        Adds a format that data can be exported as.
+
+        :param file_format: File extension including the dot, i.e. ".txt"
+        :param name: Name of format shown to user
+        :param write: Function that writes data with arguments (data, path, sheet_name)
+        """
+        DataHandler.formats[file_format] = (name, write)
+
+    @staticmethod
+    def write_excel(data: pd.DataFrame, path: str, sheet_name="Sheet1"):
+        """
+        Writes data to Excel file and auto-fits columns. Data with too many rows for a sheet is split across sheets.
+        """
+
+        # Initializes writer
+        writer = pd.ExcelWriter(path, engine='xlsxwriter')
+
+        # Gets width of columns
+        widths = DataHandler.column_widths(data)
+
+        for name, start, end in DataHandler.split_sheets(len(data), sheet_name):
+
+            # Writes data
+            data.iloc[start:end].to_excel(writer, index=False, sheet_name=name)
 
+            # Auto-fits data to columns
+            for col_idx, column_length in enumerate(widths):
+                writer.sheets[name].set_column(col_idx, col_idx, column_length)
 
-class Plot(Frame):
+        # Saves data
+        writer.close()
 
-    def __init__(self, master: Frame | Tk, plot_title="", x_label="", y_label="", data: tuple | list | int = 0, auto_fit=True, follow=120, buffer=3, x_lim: tuple = (0, 1), y_lim: tuple = (0, 1), figure_size=(4, 4), dpi=100):
+    @staticmethod
+    def column_widths(data: pd.DataFrame):
         """
-            Class for plotting data in tkinter.
-            Designed to handle continuous data feed.
-            Will automatically follow data on x-axis by showing most recent 120 points.
-            Plot will automatically scale to fit data on y-axis.
-            A buffer between the y-axis endpoints is automatically created at ± 3 units.
+        Finds width of each column in characters without converting every cell to text.
+        Numeric columns are sized from their min/max and their decimal places. Decimal places, and the width of
+        text columns, are found from the first and last rows of each export.
 
-            Data to be fed into this class should be formatted as follows:
+        :param data: Data as a pandas DataFrame
+        :return: List of widths of each column
+        """
 
-                x = [1, 2, 3, 4, 5]
-                y = [1, 2, 3, 4, 5]
-                label = "Data"
+        # Gets rows used to find precision
+        sample = pd.concat([data.head(DataHandler.autofit_sample_size), data.tail(DataHandler.autofit_sample_size)])
 
-                data = (x, y, label)
+        # Gets precision of columns from sample
+        precisions = [DataHandler.column_precision(sample.iloc[:, i]) for i in range(len(data.columns))]
 
-                plot = Plot(root, data)
+        # Initialize list for widths
+        widths = []
 
-            OR - For multiple sets of data
+        for i, column in enumerate(data.columns):
 
-                x = [1, 2, 3, 4, 5]
-                y = [1, 2, 3, 4, 5]
-                label = "Data1"
+            values = data.iloc[:, i]
 
-                data1 = (x, y, label)
+            # Numeric columns are as wide as their widest whole number plus decimal places
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                values = values.to_numpy(dtype=float)
+                values = values[np.isfinite(values)]
+                if len(values):
+                    # Keeps minus sign of values between -1 and 0, i.e. "-0"
+                    width = max(len(f"{values.min():.0f}"), len(f"{values.max():.0f}"))
+                else:
+                    width = 0
+                if precisions[i]:
+                    width += precisions[i] + 1
 
-                z = [1, 2, 3, 4, 5]
-                w = [1, 2, 3, 4, 5]
-                label2 = "Data2"
+            # Other columns use width found from sample
+            else:
+                width = precisions[i]
 
-                data2 = (z, w, label2)
+            widths.append(max(width, len(str(column))))
 
-                data = [data1, data2]
+        return widths
 
-                plot = Plot(root, data)
+    @staticmethod
+    def column_precision(values: pd.Series):
+        """
+        Finds decimal places of a numeric column, or width of any other column.
 
-            Data can also be added after initialization as follows:
+        :param values: Values of column
+        :return: Number of decimal places, or number of characters
+        """
 
-                plot = Plot(Frame)
-                plot.update_data(data)
+        # Text width of non-numeric columns
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            return int(values.astype(str).str.len().fillna(0).max()) if len(values) else 0
 
-            It is recommended to make a separate frame for the Plot class as follows:
+        # Integers don't have decimal places
+        if not pd.api.types.is_float_dtype(values):
+            return 0
 
-                plot_frame = Frame(master)
-                plot_frame.pack()
-                plot = Plot(plot_frame)
+        # Finds fewest decimal places that values are rounded to
+        values = values.to_numpy()
+        values = values[np.isfinite(values)]
+        for decimals in range(DataHandler.autofit_max_decimals):
+            if np.allclose(np.round(values, decimals), values, rtol=0, atol=10.0 ** -(decimals + 6)):
+                return decimals
+        return DataHandler.autofit_max_decimals
 
+    @staticmethod
+    def write_csv(data: pd.DataFrame, path: str, sheet_name="Sheet1"):
+        """
+        Writes data to CSV file in chunks.
+        """
+        data.to_csv(path, index=False, encoding='utf-8-sig', chunksize=DataHandler.chunk_size)
 
-            :param master: Frame or Tk to place plot on
-            :param data: Data to plot as either a tuple or list. Refer to documentation for formatting. Can be initialized after Plot using Plot.update_data(data)
+    @staticmethod
+    def write_parquet(data: pd.DataFrame, path: str, sheet_name="Sheet1"):
+        """
+        Writes data to zstd compressed Parquet file with a row group per chunk. Requires pyarrow.
+        """
+        data.to_parquet(path, index=False, compression='zstd', row_group_size=DataHandler.chunk_size)
 
-            :param plot_title: Title to be shown on plot - Optional
-            :param x_label: abel for x-axis - Optional
-            :param y_label: Label for y-axis - Optional
-            :param auto_fit: True by default. Will automatically scale plot to fit data. - Optional
-            :param follow: Amount to follow x-axis right limit by. Set to 0 to turn off. - Optional
-            :param buffer: Padding on y-axis from max and min values. - Optional
-            :param x_lim: X-axis limits. A tuple with the format: (min, max) - Optional
-            :param y_lim: Y-axis limits. A tuple with the format: (min, max) - Optional
-            :param figure_size: Size of plot. A tuple with the format: (horizontal_length, vertical_length) - Optional
-            :param dpi: Resolution of the plot. - Optional
-            """
-        super().__init__(master)
+    @staticmethod
+    def write_hdf5(data: pd.DataFrame, path: str, sheet_name="Sheet1"):
+        """
+        Writes data to zstd compressed HDF5 table in chunks, under the key "data". Requires PyTables.
+        """
+        with pd.HDFStore(path, mode='w', complevel=5, complib='blosc:zstd') as store:
+            for start in range(0, len(data), DataHandler.chunk_size):
+                store.append('data', data.iloc[start:start + DataHandler.chunk_size], index=False)
 
-        # Makes frame to hold plot
-        self.main_frame = Frame(master, background='white')
-        self.main_frame.pack()
+    @staticmethod
+    def write_feather(data: pd.DataFrame, path: str, sheet_name="Sheet1"):
+        """
+        Writes data to zstd compressed Feather file in chunks. Requires pyarrow.
+        """
+        data.to_feather(path, compression='zstd', chunksize=DataHandler.chunk_size)
 
-        # Style for plots to use
-        style.use('seaborn')
+    # Formats data can be exported as, of the form: {file extension: (name, write function)}
+    formats = {'.xlsx': ('Excel', write_excel),
+               '.csv': ('CSV', write_csv),
+               '.parquet': ('Parquet', write_parquet),
+               '.h5': ('HDF5', write_hdf5),
+               '.feather': ('Feather', write_feather)}
 
-        # Initializes parameters for use throughout class
-        self.auto_fit = auto_fit
-        self.follow = follow
-        self.buffer = buffer
 
-        # Initializes figure
-        self.figure = Figure(figure_size, dpi=dpi)
+class Recorder:
 
-        # Initializes plot
-        self.main_plot = self.figure.add_subplot(111)
+    def __init__(self, output_directory_path: str, filename: str, columns: list[str], flush_rows=100, flush_time=10):
+        """
+        Class for recording data by appending rows to a CSV journal.
+        Only new rows are written, so recording cost does not grow with recording length. Rows are held in memory and
+        written in batches of flush_rows, or at least every flush_time seconds. Use DataHandler.export() once recording
+        is done to create an Excel file from the journal.
+
+        :param output_directory_path: Path to save journal to
+        :param filename: Name of journal without extension
+        :param columns: Column headers
+        :param flush_rows: Number of rows to hold before writing
+        :param flush_time: Maximum time in seconds to hold rows before writing
+        """
 
-        # Saves title and axis labels and adds
-        self.title = plot_title
-        self.x_label = x_label
-        self.y_label = y_label
-        self.main_plot.set_title(plot_title)
-        self.main_plot.set_xlabel(x_label)
-        self.main_plot.set_ylabel(y_label)
+        # Initializes parameters for use throughout class
+        self.columns = columns
+        self.flush_rows = flush_rows
+        self.flush_time = flush_time
 
-        # If auto_size is true and data is not empty
-        if auto_fit and data != 0:
+        # Formats path if necessary
+        if output_directory_path[-1] != '/':
+            output_directory_path += '/'
 
-            # Gets axis limits for data
-            limits = self.get_data_limits(data)
+        # Try to open journal in given directory
+        try:
 
-            if self.follow == 0:
+            # Checks if directory exists or not then makes it
+            if not os.path.exists(output_directory_path):
+                os.makedirs(output_directory_path)
 
-                # Sets axis limits
-                self.main_plot.set_xlim(limits[1], limits[0])
-                self.main_plot.set_ylim(limits[3] - self.buffer, limits[2] + self.buffer)
+            # Get path
+            self.path = output_directory_path + filename + ".csv"
 
-            else:
+            # Opens journal
+            self.file = open(self.path, 'w', encoding='utf-8-sig', newline='')
 
-                # Sets axis limits
-                self.main_plot.set_xlim(limits[0] - self.follow, limits[0])
-                self.main_plot.set_ylim(limits[3] - self.buffer, limits[2] + self.buffer)
+        # If any error occurs, write journal labelled "temp <filename>.csv" instead to project directory.
+        # Filename is kept so journals of different groups don't overwrite each other.
+        except Exception as e:
 
-        else:
+            # Outputs error
+            print(e)
 
-            # Sets axis limits
-            self.main_plot.set_xlim(x_lim[0], x_lim[1])
-            self.main_plot.set_ylim(y_lim[0], y_lim[1])
+            # Get path
+            self.path = "./MCC-DAQ backup/" + "temp " + filename + ".csv"
 
-        # Plots data
-        if type(data) is tuple:
+            # Opens journal
+            self.file = open(self.path, 'w', encoding='utf-8-sig', newline='')
 
-            # Plots single set of data
-            self.main_plot.plot(data[0], data[1], label=data[2])
+        # Outputs path to terminal
+        print('Recording to: ' + self.path)
 
-            # Initializes legend in lower right corner
-            self.legend = self.main_plot.legend(loc='lower left')
+        # Writes headers
+        self.file.write(','.join(columns) + '\n')
 
-        # If data is a list of tuples
-        if type(data) is list:
+        # Initializes rows held until next flush, number of rows recorded, and time of last flush
+        self.pending = []
+        self.pending_count = 0
+        self.count = 0
+        self.flush_time_last = time.monotonic()
 
-            # Plots multiple sets of data
-            for i in data:
-                self.main_plot.plot(i[0], i[1], label=i[2])
+    def write(self, runtime, rows):
+        """
+        Adds rows to journal.
 
-            # Initializes legend in lower right corner
-            self.legend = self.main_plot.legend(loc='lower left')
+        :param runtime: Array-like of runtime of each row
+        :param rows: Array-like of shape (n, columns - 1) with the values of the remaining columns
+        """
 
+        if len(runtime) == 0:
+            return
 
-        # Draws figure
-        self.canvas = FigureCanvasTkAgg(self.figure, master=self.main_frame)  # A tk.DrawingArea.
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(ipadx=20)
+        # Holds rows until next flush
+        self.pending.append(np.column_stack((runtime, rows)))
+        self.pending_count += len(runtime)
+        self.count += len(runtime)
 
-    def clear(self):
+        # Writes rows if enough are held or enough time has passed
+        if self.pending_count >= self.flush_rows or time.monotonic() - self.flush_time_last >= self.flush_time:
+            self.flush()
+
+    def flush(self):
         """
-        Clears plot data without removing title and axes
+        Writes held rows to journal.
         """
-        # Clears plot data
-        self.main_plot.clear()
+        if self.pending:
+            np.savetxt(self.file, np.vstack(self.pending), fmt='%.10g', delimiter=',')
+            self.file.flush()
 
-        # Reinitialize title and axis labels
-        self.main_plot.set_title(self.title)
-        self.main_plot.set_xlabel(self.x_label)
-        self.main_plot.set_ylabel(self.y_label)
+        self.pending = []
+        self.pending_count = 0
+        self.flush_time_last = time.monotonic()
 
-    def update_data(self, data, x_lim=(0, 1), y_lim=(0, 1)):
+    def close(self):
+        """
+        Writes held rows and closes journal.
+        """
+        self.flush()
+        self.file.close()
 
-        # Clears previous plot data
-        self.clear()
 
-        # If auto_fit is true
-        if self.auto_fit:
+class SessionFile:
 
-            # Gets axis limits for data
-            limits = self.get_data_limits(data)
+    # Identifies session files and chunks
+    MAGIC = b'MCCDAQS1'
+    CHUNK_MAGIC = 0x4B4E4843
 
-            # Is follow is off
-            if self.follow == 0:
+    # Header is padded to a multiple of this many bytes
+    HEADER_ALIGNMENT = 4096
 
-                # Sets axis limits
-                self.main_plot.set_xlim(limits[1], limits[0])
-                self.main_plot.set_ylim(limits[3] - self.buffer, limits[2] + self.buffer)
+    def __init__(self, path: str, columns: list[str], metadata: dict = None, chunk_rows=256):
+        """
+        Binary session file that samples are appended to as they are read, so recorded data survives a crash.
 
-            else:
+        The file starts with a header holding the column names, chunk size, start time, and any metadata such as the
+        channel map and calibration. Samples follow in fixed-size chunks of chunk_rows rows of float64 values, each
+        with a sequence number, row count, and CRC32 checksum. Chunks are only ever appended, so a crash can at most
+        tear the last chunk, which SessionFile.recover() removes. Use SessionFile.read() to memory-map a file.
 
-                # Sets axis limits
-                self.main_plot.set_xlim(limits[0] - self.follow, limits[0])
-                self.main_plot.set_ylim(limits[3] - self.buffer, limits[2] + self.buffer)
+        Each write of a chunk is flushed to disk, so choose chunk_rows to cover however much data can be lost.
 
-        # If auto_fit is not true use method parameters
-        else:
+        :param path: Path of file to create. Overwrites any existing file.
+        :param columns: Names of columns after time
+        :param metadata: Dict of JSON serializable values to save in header
+        :param chunk_rows: Number of rows in each chunk
+        """
 
-            # Sets axis limits
-            self.main_plot.set_xlim(x_lim[0], x_lim[1])
-            self.main_plot.set_ylim(y_lim[0], y_lim[1])
+        # Initializes parameters for use throughout class
+        self.path = path
+        self.columns = list(columns)
+        self.chunk_rows = chunk_rows
+        self.dtype = SessionFile.chunk_dtype(len(self.columns) + 1, chunk_rows)
+
+        # Initializes chunk being filled, number of rows in it, and number of chunks written
+        self.chunk = np.zeros(1, dtype=self.dtype)
+        self.chunk_count = 0
+        self.rows = 0
+
+        # Creates header
+        header = {'columns': self.columns,
+                  'chunk_rows': chunk_rows,
+                  'start_time': time.time(),
+                  'metadata': metadata or {}}
+
+        # Writes header
+        self.file = open(path, 'wb')
+        self.file.write(SessionFile.pack_header(header))
+        self.file.flush()
+
+        # Syncs header to disk right away, so a crash before the first chunk doesn't leave a torn header
+        os.fsync(self.file.fileno())
 
-        # Plots data
-        if type(data) is tuple:
-            # Plots single set of data
-            self.main_plot.plot(data[0], data[1], label=data[2])
-        if type(data) is list:
-            # Plots multiple sets of data
-            for i in data:
-                self.main_plot.plot(i[0], i[1], label=i[2])
+    @staticmethod
+    def chunk_dtype(columns: int, chunk_rows: int):
+        """
+        Gets NumPy data type of a chunk.
 
-        # Initializes legend in lower right corner
-        self.legend = self.main_plot.legend(loc='lower left')
+        :param columns: Number of columns including time
+        :param chunk_rows: Number of rows in chunk
+        """
+        return np.dtype([('magic', '<u4'), ('sequence', '<u4'), ('rows', '<u4'), ('crc', '<u4'),
+                         ('data', '<f8', (chunk_rows, columns))])
 
-        # Applies changes
-        self.canvas.draw()
+    @staticmethod
+    def pack_header(header: dict):
+        """
+        Packs header as: magic, header length, JSON, padding to SessionFile.HEADER_ALIGNMENT.
+        """
+        header_json = json.dumps(header).encode('utf-8')
+        length = len(SessionFile.MAGIC) + 4 + len(header_json)
+        padding = -length % SessionFile.HEADER_ALIGNMENT
+
+        return SessionFile.MAGIC + struct.pack('<I', len(header_json)) + header_json + b'\0' * padding
 
     @staticmethod
-    def get_data_limits(data):
+    def unpack_header(file):
         """
-        Function to get max and min from data
+        Reads header from start of an open file.
 
-        :param data: Either tuple or list of tuples in correct format - refer to Plot __init__ documentation.
-        :return: Max and min for both x and y in data in the tuple format: (x_maximum, x_minimum, y_maximum, y_minimum)
+        :return: Tuple of the form: (header, offset of first chunk)
         """
+        if file.read(len(SessionFile.MAGIC)) != SessionFile.MAGIC:
+            raise ValueError("Not a session file.")
+
+        # Raises ValueError for headers cut short, i.e. by a crash while the file was created
+        length_bytes = file.read(4)
+        if len(length_bytes) < 4:
+            raise ValueError("Session file header is incomplete.")
+        length = struct.unpack('<I', length_bytes)[0]
+        header_bytes = file.read(length)
+        if len(header_bytes) < length:
+            raise ValueError("Session file header is incomplete.")
+        header = json.loads(header_bytes.decode('utf-8'))
+        offset = len(SessionFile.MAGIC) + 4 + length
+
+        return header, offset + -offset % SessionFile.HEADER_ALIGNMENT
+
+    def append(self, times, rows):
+        """
+        Appends samples. Full chunks are written to disk.
 
-        # If data is a single set
-        if type(data) == tuple:
-            return np.max(data[0]), np.min(data[0]), np.max(data[1]), np.min(data[1])
+        :param times: Array-like of sample times with length n
+        :param rows: Array-like of shape (n, columns)
+        """
+        block = np.column_stack((times, rows))
 
-        # If data is multiple sets
-        if type(data) == list:
+        while len(block):
 
-            # Initialize max and min values
-            x_maximum = -10**10
-            x_minimum = 10**10
-            y_maximum = -10 ** 10
-            y_minimum = 10 ** 10
+            # Fills current chunk
+            count = min(len(block), self.chunk_rows - self.rows)
+            self.chunk['data'][0, self.rows:self.rows + count] = block[:count]
+            self.rows += count
+            block = block[count:]
 
-            # Checks for max and min in each set and updates overall max and min
-            for x in data:
+            # Writes chunk if full
+            if self.rows == self.chunk_rows:
+                self.flush()
 
-                if np.max(x[0]) > x_maximum:
-                    x_maximum = np.max(x[0])
-                if np.min(x[0]) < x_minimum:
-                    x_minimum = np.min(x[0])
+    def flush(self):
+        """
+        Writes current chunk to disk, even if it isn't full, and starts a new chunk.
+        """
+        if self.rows == 0:
+            return
+
+        # Fills chunk header. Checksum covers the rows in use.
+        self.chunk['magic'] = SessionFile.CHUNK_MAGIC
+        self.chunk['sequence'] = self.chunk_count
+        self.chunk['rows'] = self.rows
+        self.chunk['crc'] = zlib.crc32(self.chunk['data'][0, :self.rows].tobytes())
+
+        # Writes chunk and waits for it to reach the disk
+        self.file.write(self.chunk.tobytes())
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+        # Starts new chunk
+        self.chunk_count += 1
+        self.chunk[0] = 0
+        self.rows = 0
+
+    def close(self):
+        """
+        Writes current chunk and closes file.
+        """
+        self.flush()
+        self.file.close()
 
-                if np.max(x[1]) > y_maximum:
-                    y_maximum = np.max(x[1])
-                if np.min(x[1]) < y_minimum:
-                    y_minimum = np.min(x[1])
+    @staticmethod
+    def read(path: str):
+        """
+        Memory-maps a session file without reading its samples.
 
-            return x_maximum, x_minimum, y_maximum, y_minimum
+        :param path: Path of session file
+        :return: Tuple of the form: (header, chunks) where chunks is a memory-mapped array of chunks. Use
+        SessionFile.samples() to get samples from chunks.
+        """
+        with open(path, 'rb') as file:
+            header, offset = SessionFile.unpack_header(file)
 
+        dtype = SessionFile.chunk_dtype(len(header['columns']) + 1, header['chunk_rows'])
+        chunk_count = (os.path.getsize(path) - offset) // dtype.itemsize
 
-class DataHandler:
-    """
-    Class for handling application data.
-    """
+        # Maps only whole chunks
+        if chunk_count == 0:
+            return header, np.zeros(0, dtype=dtype)
+
+        return header, np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(chunk_count,))
 
     @staticmethod
-    def export(data: pd.DataFrame, output_directory_path: str, filename: str, sheet_name="Sheet1"):
+    def samples(chunks):
         """
-        Method to export pandas dataframe to Excel file. Compatible with single dataframe. Auto-fits columns.
-        :param data: Data as a pandas DataFrame
-        :param output_directory_path: Path to export file to
-        :param filename: Name of file
-        :param sheet_name: Name of sheet
+        Gets samples from chunks.
+
+        :param chunks: Chunks from SessionFile.read()
+        :return: NumPy array of shape (samples, columns) with time as the first column
         """
+        if len(chunks) == 0:
+            return np.zeros((0, chunks.dtype['data'].shape[1]))
 
-        # Formats path if necessary
-        if output_directory_path[-1] != '/':
-            output_directory_path += '/'
+        return np.concatenate([x['data'][:x['rows']] for x in chunks])
 
-        # Checks if directory exists or not then makes it
-        if not os.path.exists(output_directory_path):
-            os.makedirs(output_directory_path)
+    @staticmethod
+    def recover(path: str):
+        """
+        Checks every chunk of a session file and truncates the file at the first chunk that is torn or out of
+        sequence, such as a chunk that was being written when the app crashed.
 
-        # Try to write data to given filename
-        try:
+        :param path: Path of session file
+        :return: Number of samples in recovered file
+        """
+        valid_chunks = 0
+        samples = 0
 
-            # Get path
-            path = output_directory_path + filename + ".xlsx"
+        with open(path, 'r+b') as file:
+            header, offset = SessionFile.unpack_header(file)
+            dtype = SessionFile.chunk_dtype(len(header['columns']) + 1, header['chunk_rows'])
 
-            # Outputs path to terminal
-            print('Data saved to: ' + path)
+            # Reads chunks one at a time rather than memory-mapping, so the file can be truncated afterwards
+            file.seek(offset)
+            while True:
+                chunk_bytes = file.read(dtype.itemsize)
 
-            # Initializes writer
-            writer = pd.ExcelWriter(path, engine='xlsxwriter')
+                # Stops at end of file or a partly written chunk
+                if len(chunk_bytes) < dtype.itemsize:
+                    break
 
-        # If any error occurs, write file labelled "temp xlsx" instead to project directory
-        except Exception as e:
+                chunk = np.frombuffer(chunk_bytes, dtype=dtype)[0]
 
-            # Outputs error
-            print(e)
+                # Stops at first chunk that is not intact
+                if chunk['magic'] != SessionFile.CHUNK_MAGIC or chunk['sequence'] != valid_chunks or chunk['rows'] > header['chunk_rows']:
+                    break
+                if zlib.crc32(chunk['data'][:chunk['rows']].tobytes()) != chunk['crc']:
+                    break
 
-            # Get path
-            path = "./MCC-DAQ backup/" + "temp.xlsx"
+                valid_chunks += 1
+                samples += int(chunk['rows'])
 
-            # Outputs path to terminal
-            print('Data saved to: ' + path)
+            # Removes torn chunk and anything after it
+            file.truncate(offset + valid_chunks * dtype.itemsize)
 
-            # Initializes writer
-            writer = pd.ExcelWriter(path, engine='xlsxwriter')
+        return samples
 
-        # Writes data
-        data.to_excel(writer, index=False)
 
-        # Auto-fits data to columns
-        for column in data:
-            column_length = max(data[column].astype(str).map(len).max(), len(column))
-            col_idx = data.columns.get_loc(column)
-            writer.sheets[sheet_name].set_column(col_idx, col_idx, column_length)
+class ExportWorker(threading.Thread):
 
-        # Saves data
-        writer.close()
+    def __init__(self):
+        """
+        Thread that runs DataHandler.export() in the background so slow disks don't stall the GUI.
+        Exports are queued with submit(). If an export is submitted for a file that already has one waiting, the older
+        one is dropped, as the newer one holds more recent data. Results are collected with get_results().
+        """
+        super().__init__(daemon=True)
+
+        # Exports waiting to run, keyed by path so only the newest for each file is kept
+        self.pending = {}
+
+        # Condition for waiting on and signalling changes to self.pending and self.busy
+        self.condition = threading.Condition()
+        self.busy = False
+        self.stopped = False
+
+        # Results of finished exports of the form: (status, message)
+        self.results = queue.Queue()
+
+    def submit(self, data, output_directory_path: str, filename: str, **options):
+        """
+        Queues data to be exported. Arguments are the same as DataHandler.export().
+
+        :param data: Data as a pandas DataFrame, or a function that returns one so it is created on the export thread
+        :param output_directory_path: Path to export file to
+        :param filename: Name of file
+        :param options: Keyword arguments of DataHandler.export(), i.e. file_format
+        """
+        with self.condition:
+
+            # Replaces older export of same file
+            file_format = options.get('file_format', '.xlsx')
+            self.pending[(output_directory_path, filename, file_format)] = (data, output_directory_path, filename, options)
+            self.condition.notify_all()
+
+    def get_results(self):
+        """
+        Gets results of exports finished since last call.
+
+        :return: List of tuples of the form: (status, message). Status is 'done' with the path as the message, or
+        'error' with the error as the message.
+        """
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def run(self):
+        while True:
+
+            # Waits for an export
+            with self.condition:
+                while not self.pending and not self.stopped:
+                    self.condition.wait()
+
+                # Stops once all exports are done
+                if not self.pending:
+                    return
+
+                # Takes oldest export
+                data, output_directory_path, filename, options = self.pending.pop(next(iter(self.pending)))
+                self.busy = True
+
+            # Exports data
+            try:
+                if callable(data):
+                    with Timings.span('DataFrame construction'):
+                        data = data()
+                self.results.put(('done', DataHandler.export(data, output_directory_path, filename, **options)))
+
+            except Exception as e:
+                print(e)
+                self.results.put(('error', str(e)))
+
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+    def stop(self):
+        """
+        Finishes queued exports and stops thread.
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+        if self.is_alive():
+            self.join()
 
 
 # Runs app and updates every 5000ms.
-# 5000ms is the minimum recommended refresh time as it takes about 4000ms to perform operations.
+# Board is read on its own thread every 5000ms. Sample time should be longer than the time it takes to read every channel.
 # Use whole numbers for fresh rate (i.e. 1000, 2000, 3000, etc)
 # App will output error to terminal if operation time exceeds refresh rate.
-app = App(5000)
-# Sets handle for application closing event
-app.protocol("WM_DELETE_WINDOW", app.on_closing)
-# Runs main app thread during runtime
-app.main_thread()
-app.mainloop()
+# Only runs when launched directly, so the classes above can be imported by other scripts.
+if __name__ == "__main__":
+    # Shows why the board can't be used in a dialog, as pythonw has no terminal to print to
+    if ul is None:
+        root = Tk()
+        root.withdraw()
+        messagebox.showerror("MCC-DAQ", "MCC driver could not be loaded, so the board can't be read.\n\n" + repr(driver_error) +
+                             "\n\nSet the MCC_DAQ_SIMULATE environment variable to 1 to run with a simulated board instead.")
+        root.destroy()
+    else:
+        app = App(5000)
+        # Sets handle for application closing event
+        app.protocol("WM_DELETE_WINDOW", app.on_closing)
+        # Runs main app thread during runtime
+        app.main_thread()
+        app.mainloop()
@@ -0,0 +1,369 @@
+# Benchmarks board configuration and reads, updates, plotting and exports against the simulated board at realistic run lengths.
+# Run from the project directory. Results are saved as JSON so runs can be compared across versions:
+#   python tests/benchmark.py
+#   python tests/benchmark.py --histories 1h --channels 3 --compare "MCC-DAQ backup/benchmarks/old.json"
+# Plot and main_update benchmarks need a display and are skipped without one.
+# Exits with an error if importing controller.pyw takes longer than --import-budget ms.
+from importlib.machinery import SourceFileLoader
+import importlib.util
+import numpy as np
+import pandas as pd
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# Loads classes from controller.pyw with the simulated board and without starting the app
+os.environ['MCC_DAQ_SIMULATE'] = '1'
+loader = SourceFileLoader("controller", "controller.pyw")
+controller = importlib.util.module_from_spec(importlib.util.spec_from_loader("controller", loader))
+loader.exec_module(controller)
+Controller = controller.Controller
+DataHandler = controller.DataHandler
+
+# Run lengths of accumulated history in seconds
+histories = {'1h': 3600, '24h': 86400, '7d': 604800}
+
+# Modules that are slow to import, which controller.pyw should only load on first use
+slow_modules = ['pandas', 'matplotlib', 'xlsxwriter', 'openpyxl', 'pyarrow', 'tables']
+
+# Imports controller.pyw in a new interpreter and prints import time in ms and slow modules it loaded as JSON
+import_code = """
+import time
+start = time.perf_counter_ns()
+from importlib.machinery import SourceFileLoader
+import importlib.util
+import json
+import sys
+loader = SourceFileLoader("controller", "controller.pyw")
+loader.exec_module(importlib.util.module_from_spec(importlib.util.spec_from_loader("controller", loader)))
+duration = (time.perf_counter_ns() - start) / 1e6
+print(json.dumps({'duration_ms': duration, 'loaded': [x for x in %r if x in sys.modules]}))
+""" % slow_modules
+
+
+def time_function(function, repeats):
+    """
+    Times a function.
+    :param function: Function without arguments
+    :param repeats: Number of times to run function
+    :return: Dict of repeats, and mean, p50, p95 and min duration in ms
+    """
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        function()
+        durations.append((time.perf_counter_ns() - start) / 1e6)
+    durations = np.array(durations)
+    return {'repeats': repeats,
+            'mean_ms': float(durations.mean()),
+            'p50_ms': float(np.percentile(durations, 50)),
+            'p95_ms': float(np.percentile(durations, 95)),
+            'min_ms': float(durations.min())}
+
+
+def make_history(rows, channels, sample_time):
+    """
+    Makes sample times and values of a run.
+    :param rows: Number of samples
+    :param channels: Number of channels
+    :param sample_time: Time in ms between samples
+    :return: Tuple of the form: (times, values of shape (rows, channels))
+    """
+    times = np.arange(rows) * sample_time / 1000
+    values = np.round(22 + np.random.standard_normal((rows, channels)), 1)
+    return times, values
+
+
+def benchmark_import(repeats, budget):
+    """
+    Times import of controller.pyw in a new interpreter, as on launch, and checks it against a budget in ms.
+    Also lists slow modules loaded by the import, which should be loaded on first use instead.
+    """
+    durations = []
+    loaded = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', import_code], capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        durations.append(result['duration_ms'])
+        loaded = result['loaded']
+    durations = np.array(durations)
+    return [{'benchmark': 'import controller.pyw', 'repeats': repeats,
+             'mean_ms': float(durations.mean()),
+             'p50_ms': float(np.percentile(durations, 50)),
+             'p95_ms': float(np.percentile(durations, 95)),
+             'min_ms': float(durations.min()),
+             'budget_ms': budget,
+             'within_budget': bool(np.percentile(durations, 50) <= budget),
+             'slow_modules_loaded': loaded}]
+
+
+def benchmark_reads(channel_counts, repeats):
+    """
+    Times thermocouple and analog read paths.
+    """
+    results = []
+    for channel_count in channel_counts:
+        channels = list(range(channel_count))
+        Controller.initialize_thermocouple_read(channels)
+        for name in ['thermocouple_scan_read', 'thermocouple_instantaneous_read']:
+            results.append({'benchmark': 'Controller.' + name, 'channels': channel_count,
+                            **time_function(lambda: getattr(Controller, name)(channels), repeats)})
+        Controller.initialize_analog_read(channels)
+        for name in ['analog_scan_read', 'analog_read']:
+            results.append({'benchmark': 'Controller.' + name, 'channels': channel_count,
+                            **time_function(lambda: getattr(Controller, name)(channels), repeats)})
+
+        # Thermocouples on even channels and analog inputs on odd channels, so neither can be read with one range scan
+        thermocouple_channels = list(range(0, 2 * channel_count, 2))
+        analog_channels = list(range(1, 2 * channel_count, 2))
+        Controller.initialize_thermocouple_read(thermocouple_channels)
+        Controller.initialize_analog_read(analog_channels)
+        plans = [('thermocouple_scan_read', thermocouple_channels, Controller.plan_scan(thermocouple_channels, 't_in_scan')),
+                 ('analog_scan_read', analog_channels, Controller.plan_scan(analog_channels, 'a_in_scan', samples=5, rate=20))]
+        for name, interleaved_channels, plan in plans:
+            results.append({'benchmark': 'Controller.' + name + ' interleaved', 'channels': channel_count, 'plan': repr(plan),
+                            **time_function(lambda: getattr(Controller, name)(interleaved_channels), repeats)})
+    return results
+
+
+def benchmark_configuration(channel_counts, repeats, realtime):
+    """
+    Times thermocouple channel configuration on a new board, again with nothing changed, which sends nothing, and on a
+    relaunch, which loads the board state saved by the last launch and reads back one setting to check it.
+    Simulated call times are estimates, so compare the number of calls rather than the times.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'board state.json')
+        for channel_count in channel_counts:
+            channels = list(range(channel_count))
+            for name in ['first', 'unchanged', 'relaunch']:
+                durations = []
+                for _ in range(repeats):
+                    if name == 'first':
+                        Controller.set_backend(controller.SimulatedBoard(realtime=realtime, seed=0))
+                    start = Controller.configuration_sent
+                    if name == 'relaunch':
+                        # Forgets cached state as a new process would, keeping the board as it was configured
+                        Controller.save_board_state(path)
+                        Controller.set_backend(controller.ul)
+                        durations.append(time_function(lambda: (Controller.load_board_state(channels, path=path),
+                                                                Controller.initialize_thermocouple_read(channels, rate=10)), 1)['mean_ms'])
+                    else:
+                        durations.append(time_function(lambda: Controller.initialize_thermocouple_read(channels, rate=10), 1)['mean_ms'])
+                durations = np.array(durations)
+                results.append({'benchmark': 'Controller.configure ' + name, 'channels': channel_count,
+                                'settings_sent': Controller.configuration_sent - start, 'repeats': repeats,
+                                'mean_ms': float(durations.mean()),
+                                'p50_ms': float(np.percentile(durations, 50)),
+                                'p95_ms': float(np.percentile(durations, 95)),
+                                'min_ms': float(durations.min())})
+    return results
+
+
+def benchmark_data_limits(history_names, channel_counts, sample_time, repeats):
+    """
+    Times Plot.get_data_limits over full history.
+    """
+    results = []
+    for history in history_names:
+        rows = int(histories[history] * 1000 // sample_time)
+        for channel_count in channel_counts:
+            times, values = make_history(rows, channel_count, sample_time)
+            data = [(times, values[:, i]) for i in range(channel_count)]
+            results.append({'benchmark': 'Plot.get_data_limits', 'history': history, 'rows': rows, 'channels': channel_count,
+                            **time_function(lambda: controller.Plot.get_data_limits(data), repeats)})
+    return results
+
+
+def benchmark_exports(history_names, channel_counts, sample_time, file_formats, repeats):
+    """
+    Times DataHandler.export of full history to a temporary directory.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for history in history_names:
+            rows = int(histories[history] * 1000 // sample_time)
+            for channel_count in channel_counts:
+                times, values = make_history(rows, channel_count, sample_time)
+                data = pd.DataFrame(values, columns=['Channel ' + str(x) + ' (°C)' for x in range(channel_count)])
+                data.insert(0, 'Runtime (s)', times)
+                for file_format in file_formats:
+                    result = {'benchmark': 'DataHandler.export ' + file_format, 'history': history, 'rows': rows,
+                              'channels': channel_count}
+                    try:
+                        result.update(time_function(lambda: DataHandler.export(data, directory, 'benchmark', file_format=file_format), repeats))
+                    except ImportError as e:
+                        result['skipped'] = str(e)
+                    results.append(result)
+    return results
+
+
+def benchmark_plots(root, history_names, channel_counts, sample_time, repeats):
+    """
+    Times Plot.update_data with one new sample per update, as in the app.
+    """
+    results = []
+    for history in history_names:
+        rows = int(histories[history] * 1000 // sample_time)
+        for channel_count in channel_counts:
+            times, values = make_history(rows + repeats, channel_count, sample_time)
+            for blit in [False, True]:
+                plot = controller.Plot(root, "Benchmark", "Time (s)", "Temperature (°C)", figure_size=(4, 6), blit=blit)
+                plot.pack()
+                root.update()
+
+                # Each update has one more sample than the last
+                end = [rows]
+
+                def update():
+                    end[0] += 1
+                    plot.update_data([(times[:end[0]], values[:end[0], i], "Channel " + str(i)) for i in range(channel_count)])
+                    root.update()
+
+                update()
+                results.append({'benchmark': 'Plot.update_data' + (' blit' if blit else ''), 'history': history,
+                                'rows': rows, 'channels': channel_count, **time_function(update, repeats - 1)})
+                plot.destroy()
+    return results
+
+
+def benchmark_ticks(history_names, sample_time, repeats):
+    """
+    Times App.main_update with one new sample of each channel group per tick, using the app's own channels.
+    App is run in a temporary directory so its session files don't affect the real ones.
+    """
+    results = []
+    project_directory = os.getcwd()
+    for history in history_names:
+        rows = int(histories[history] * 1000 // sample_time)
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            os.makedirs("MCC-DAQ backup")
+            try:
+                app = controller.App(sample_time)
+                app.withdraw()
+                app.acquisition.stop()
+
+                # Fills stores with history
+                for group, store in app.samples.items():
+                    store.extend(*make_history(rows, len(store.columns), sample_time))
+
+                # Next sample time of each tick
+                sample_times = [rows * sample_time / 1000]
+
+                def tick():
+                    for group, buffer in app.acquisition.buffers.items():
+                        buffer.write([sample_times[0], *np.ones(buffer.data.shape[1] - 1)])
+                    sample_times[0] += sample_time / 1000
+                    app.main_update()
+                    app.update()
+
+                tick()
+                results.append({'benchmark': 'App.main_update', 'history': history, 'rows': rows,
+                                'channels': sum(len(x.columns) for x in app.samples.values()),
+                                **time_function(tick, repeats - 1)})
+
+                # Closes app without archiving session files
+                app.export_worker.stop()
+                for session in app.sessions.values():
+                    if session is not None:
+                        session.close()
+                app.destroy()
+            finally:
+                os.chdir(project_directory)
+    return results
+
+
+def compare(results, path):
+    """
+    Prints ratio of mean times of results to mean times of a previous run.
+    """
+    with open(path) as file:
+        previous = json.load(file)
+
+    # Matches results by benchmark and size
+    key = lambda x: (x['benchmark'], x.get('history'), x.get('channels'))
+    previous_means = {key(x): x['mean_ms'] for x in previous['results'] if 'mean_ms' in x}
+
+    print("\nCompared to " + path + " (" + str(previous.get('version')) + "):")
+    for result in results:
+        if 'mean_ms' in result and key(result) in previous_means:
+            print(f"{result['benchmark']:40} {str(result.get('history', '')):4} {result.get('channels', ''):>3} channels: "
+                  f"{previous_means[key(result)]:10.3f} ms -> {result['mean_ms']:10.3f} ms "
+                  f"({result['mean_ms'] / previous_means[key(result)]:.2f}x)")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmarks MCC-DAQ against the simulated board.")
+    parser.add_argument('--histories', nargs='+', default=list(histories), choices=list(histories))
+    parser.add_argument('--channels', nargs='+', type=int, default=[3, 16, 64])
+    parser.add_argument('--sample-time', type=float, default=1000, help="Time in ms between samples of history")
+    parser.add_argument('--formats', nargs='+', default=['.parquet', '.csv'], help="Export formats, i.e. .xlsx")
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--export-repeats', type=int, default=1)
+    parser.add_argument('--import-budget', type=float, default=500, help="Largest median time in ms to import controller.pyw")
+    parser.add_argument('--realtime', action='store_true', help="Include simulated board latency in read times")
+    parser.add_argument('--output', default=None, help="Path of JSON results")
+    parser.add_argument('--compare', default=None, help="Path of JSON results of a previous run to compare to")
+    args = parser.parse_args()
+
+    # Simulated board without delays measures the code around the board, with delays the modelled read time
+    Controller.set_backend(controller.SimulatedBoard(realtime=args.realtime, seed=0))
+
+    # Gets version of code being benchmarked
+    try:
+        version = subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        version = None
+
+    results = benchmark_import(min(args.repeats, 5), args.import_budget)
+    results += benchmark_configuration(args.channels, args.repeats, args.realtime)
+    Controller.set_backend(controller.SimulatedBoard(realtime=args.realtime, seed=0))
+    results += benchmark_reads(args.channels, args.repeats)
+    results += benchmark_data_limits(args.histories, args.channels, args.sample_time, args.repeats)
+    results += benchmark_exports(args.histories, args.channels, args.sample_time, args.formats, args.export_repeats)
+
+    # Plot and app benchmarks need a display
+    try:
+        root = controller.Tk()
+        root.withdraw()
+    except controller.TclError as e:
+        print("Skipping plot and main_update benchmarks: " + str(e))
+        results += [{'benchmark': 'Plot.update_data', 'skipped': str(e)}, {'benchmark': 'App.main_update', 'skipped': str(e)}]
+    else:
+        plot_window = controller.Toplevel(root)
+        results += benchmark_plots(plot_window, args.histories, args.channels, args.sample_time, args.repeats)
+        root.destroy()
+        results += benchmark_ticks(args.histories, args.sample_time, args.repeats)
+
+    for result in results:
+        print(json.dumps(result))
+
+    # Saves results
+    output = args.output or os.path.join("MCC-DAQ backup", "benchmarks", datetime.datetime.now().strftime("benchmark %Y-%m-%d %H-%M-%S.json"))
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump({'version': version,
+                   'time': datetime.datetime.now().isoformat(),
+                   'python': sys.version,
+                   'platform': platform.platform(),
+                   'settings': vars(args),
+                   'results': results}, file, indent=2)
+    print("Results saved to: " + output)
+
+    if args.compare:
+        compare(results, args.compare)
+
+    # Fails if controller.pyw takes too long to import, so slow startups are caught
+    if not results[0]['within_budget']:
+        print(f"\nImport of controller.pyw took {results[0]['p50_ms']:.0f} ms, over budget of {args.import_budget:.0f} ms. "
+              f"Slow modules loaded on import: {results[0]['slow_modules_loaded']}")
+        sys.exit(1)
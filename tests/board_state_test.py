@@ -0,0 +1,73 @@
+# Checks that board state saved by one launch is only trusted by the next while the board still has it, i.e. that a
+# channel whose type was changed outside the app is configured again. Runs without the board or a display. Run from the
+# project directory with python tests/board_state_test.py, or with pytest.
+from importlib.machinery import SourceFileLoader
+import importlib.util
+import os
+import tempfile
+
+# Loads classes from controller.pyw with the simulated board and without starting the app
+os.environ['MCC_DAQ_SIMULATE'] = '1'
+loader = SourceFileLoader("controller", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "controller.pyw"))
+controller = importlib.util.module_from_spec(importlib.util.spec_from_loader("controller", loader))
+loader.exec_module(controller)
+Controller = controller.Controller
+AiChanType = controller.AiChanType
+BoardInfo = controller.BoardInfo
+InfoType = controller.InfoType
+
+# Channels configured as thermocouples
+channels = list(range(4))
+
+
+def relaunch(directory, change_board=None):
+    """
+    Configures channels on a simulated board and saves its state, then configures them again with the saved state as
+    the next launch would.
+    :param change_board: Function called with the board between launches, i.e. to change it as InstaCal would
+    :return: Tuple of the form: (settings loaded, settings sent on relaunch, board)
+    """
+    path = os.path.join(directory, 'board state.json')
+    board = controller.SimulatedBoard(realtime=False, seed=0)
+    Controller.set_backend(board)
+    Controller.initialize_thermocouple_read(channels)
+    Controller.save_board_state(path)
+
+    if change_board is not None:
+        change_board(board)
+
+    # Forgets cached state as a new process would, keeping the board as it was configured
+    Controller.set_backend(board)
+    loaded = Controller.load_board_state(channels, path=path)
+    start = Controller.configuration_sent
+    Controller.initialize_thermocouple_read(channels)
+    return loaded, Controller.configuration_sent - start, board
+
+
+def test_unchanged():
+    with tempfile.TemporaryDirectory() as directory:
+        loaded, sent, board = relaunch(directory)
+        assert loaded > 0 and sent == 0, (loaded, sent)
+
+
+def test_type_changed():
+    with tempfile.TemporaryDirectory() as directory:
+        def change_type(board):
+            board.set_config(InfoType.BOARDINFO, 0, 2, BoardInfo.ADCHANTYPE, AiChanType.VOLTAGE)
+
+        loaded, sent, board = relaunch(directory, change_type)
+        assert sent > 0, sent
+        assert board.config[(0, 2, BoardInfo.ADCHANTYPE)] == AiChanType.TC
+
+
+def test_board_reset():
+    with tempfile.TemporaryDirectory() as directory:
+        loaded, sent, board = relaunch(directory, lambda board: board.config.clear())
+        assert loaded == 0 and sent > 0, (loaded, sent)
+        assert all(board.config[(0, x, BoardInfo.ADCHANTYPE)] == AiChanType.TC for x in channels)
+
+
+if __name__ == "__main__":
+    for test in [test_unchanged, test_type_changed, test_board_reset]:
+        test()
+        print(test.__name__ + ": passed")
@@ -0,0 +1,61 @@
+# Compares write time and file size of each DataHandler export format.
+# Run from the project directory. Formats with missing libraries are skipped.
+# Files are written to a temporary directory and deleted once measured, as the largest are several GiB.
+from importlib.machinery import SourceFileLoader
+import importlib.util
+import numpy as np
+import pandas as pd
+import os
+import tempfile
+import time
+
+# Loads classes from controller.pyw without starting the app
+loader = SourceFileLoader("controller", "controller.pyw")
+controller = importlib.util.module_from_spec(importlib.util.spec_from_loader("controller", loader))
+loader.exec_module(controller)
+DataHandler = controller.DataHandler
+
+# Directory to write benchmark files to, deleted when done
+output_directory = tempfile.TemporaryDirectory()
+output_directory_path = output_directory.name + "/"
+
+
+def make_data(rows, channels=3):
+    """
+    Makes data shaped like a recording of thermocouples, conductivity probes and pumps.
+    :param rows: Number of rows
+    :param channels: Number of channels of each type
+    :return: Data as a pandas DataFrame
+    """
+    data = {'Runtime (s)': np.round(np.arange(rows) * 5.0, 1)}
+    for i in range(channels):
+        data[f'Channel {i} (°C)'] = np.round(20 + np.random.standard_normal(rows), 1)
+    for i in range(channels):
+        data[f'Channel {i} (mS)'] = np.round(10 + np.random.standard_normal(rows), 1)
+    for i in range(channels):
+        data[f'VDAC Channel {i} (mL/min)'] = np.full(rows, 1.5)
+    return pd.DataFrame(data)
+
+
+for rows in [10 ** 5, 10 ** 6, 10 ** 7]:
+
+    data = make_data(rows)
+
+    for file_format in DataHandler.formats:
+
+        if file_format == '.xlsx' and rows > DataHandler.excel_row_limit:
+            print(f"{rows} rows - {file_format}: n/a, over Excel sheet row limit")
+            continue
+
+        try:
+            start = time.perf_counter()
+            path = DataHandler.export(data, output_directory_path, 'benchmark', file_format=file_format)
+            duration = time.perf_counter() - start
+        except ImportError as e:
+            print(f"{rows} rows - {file_format}: skipped, {e}")
+            continue
+
+        print(f"{rows} rows - {file_format}: {duration:.2f} s, {os.path.getsize(path) / 2 ** 20:.1f} MiB")
+        os.remove(path)
+
+output_directory.cleanup()
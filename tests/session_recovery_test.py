@@ -0,0 +1,103 @@
+# Checks recovery of session files left by a crash: an empty file, a torn header, and a torn last chunk.
+# Runs without the board or a display. Run from the project directory with python tests/session_recovery_test.py,
+# or with pytest.
+from importlib.machinery import SourceFileLoader
+import importlib.util
+import numpy as np
+import os
+import tempfile
+
+# Loads classes from controller.pyw with the simulated board and without starting the app
+os.environ['MCC_DAQ_SIMULATE'] = '1'
+loader = SourceFileLoader("controller", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "controller.pyw"))
+controller = importlib.util.module_from_spec(importlib.util.spec_from_loader("controller", loader))
+loader.exec_module(controller)
+App = controller.App
+SessionFile = controller.SessionFile
+
+# Columns of test session files
+columns = ['Channel 0 (°C)', 'Channel 1 (°C)']
+
+
+def write_session(path, rows, chunk_rows=4):
+    """
+    Writes a session file of a number of samples and closes it.
+    :return: Samples written, with time as the first column
+    """
+    samples = np.column_stack((np.arange(rows, dtype=np.float64), np.random.standard_normal((rows, len(columns)))))
+    session = SessionFile(path, columns, metadata={'group': 'thermocouple'}, chunk_rows=chunk_rows)
+    session.append(samples[:, 0], samples[:, 1:])
+    session.close()
+    return samples
+
+
+def recover(directory, path):
+    """
+    Recovers a session file as App does at startup.
+    :return: Tuple of the form: (message, files in directory after recovery)
+    """
+    message = App.recover_session(path)
+    return message, os.listdir(directory)
+
+
+def test_empty_file():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "session thermocouple.mcds")
+        open(path, 'wb').close()
+
+        message, files = recover(directory, path)
+
+        assert message.startswith("Could not recover"), message
+        assert len(files) == 1 and files[0].endswith(" thermocouple damaged.mcds"), files
+
+
+def test_torn_header():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "session thermocouple.mcds")
+        write_session(path, 0)
+
+        # Cuts file off partway through the header's JSON
+        with open(path, 'r+b') as file:
+            file.truncate(len(SessionFile.MAGIC) + 4 + 10)
+
+        message, files = recover(directory, path)
+
+        assert message.startswith("Could not recover"), message
+        assert len(files) == 1 and files[0].endswith(" thermocouple damaged.mcds"), files
+
+
+def test_header_only():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "session thermocouple.mcds")
+        write_session(path, 0)
+
+        message, files = recover(directory, path)
+
+        assert message.startswith("Recovered 0 samples"), message
+        assert len(files) == 1 and not files[0].endswith("damaged.mcds"), files
+
+
+def test_torn_chunk():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "session thermocouple.mcds")
+        samples = write_session(path, 10, chunk_rows=4)
+
+        # Cuts file off partway through the last chunk, which holds samples 8 and 9
+        with open(path, 'rb') as file:
+            header, offset = SessionFile.unpack_header(file)
+        chunk_size = SessionFile.chunk_dtype(len(columns) + 1, 4).itemsize
+        with open(path, 'r+b') as file:
+            file.truncate(offset + 2 * chunk_size + chunk_size // 2)
+
+        message, files = recover(directory, path)
+
+        assert message.startswith("Recovered 8 samples"), message
+        header, chunks = SessionFile.read(os.path.join(directory, files[0]))
+        assert np.array_equal(SessionFile.samples(chunks), samples[:8])
+        del chunks
+
+
+if __name__ == "__main__":
+    for test in [test_empty_file, test_torn_header, test_header_only, test_torn_chunk]:
+        test()
+        print(test.__name__ + ": passed")
@@ -0,0 +1,73 @@
+# Checks that thermocouple scans only raise for open or out of range thermocouples that were requested, not for channels
+# between requested ones that were scanned and dropped. Runs without the board or a display. Run from the project
+# directory with python tests/thermocouple_scan_error_test.py, or with pytest.
+from importlib.machinery import SourceFileLoader
+import importlib.util
+import numpy as np
+import os
+
+# Loads classes from controller.pyw with the simulated board and without starting the app
+os.environ['MCC_DAQ_SIMULATE'] = '1'
+loader = SourceFileLoader("controller", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "controller.pyw"))
+controller = importlib.util.module_from_spec(importlib.util.spec_from_loader("controller", loader))
+loader.exec_module(controller)
+Controller = controller.Controller
+ErrorCode = controller.ErrorCode
+
+# Channels read, with channel 2 between them
+channels = [0, 1, 3]
+
+
+def scan(**board_options):
+    """
+    Reads channels with one t_in_scan of channels 0-3 on a simulated board.
+    :param board_options: Arguments of SimulatedBoard, i.e. out_of_range_channels
+    :return: Temperatures of channels
+    """
+    Controller.set_backend(controller.SimulatedBoard(realtime=False, seed=0, **board_options))
+    Controller.initialize_thermocouple_read(list(range(4)))
+
+    # Makes another call cost more than scanning channel 2, so channels 0-3 are read with one scan
+    scan_latency = Controller.scan_latency
+    Controller.scan_latency = {**scan_latency, 't_in_scan': 1.0}
+    try:
+        assert Controller.plan_scan(channels, 't_in_scan').scans == [(0, 3)]
+        return Controller.thermocouple_scan_read(channels)
+    finally:
+        Controller.scan_latency = scan_latency
+
+
+def scan_error(**board_options):
+    """
+    Reads channels as scan() does, expecting an error.
+    :return: Error code raised
+    """
+    try:
+        scan(**board_options)
+    except controller.SimulatedULError as e:
+        return e.errorcode
+    raise AssertionError("Scan didn't raise an error.")
+
+
+def test_gap_open():
+    temperatures = scan(open_channels=[2])
+    assert len(temperatures) == 3 and np.all(temperatures > 0), temperatures
+
+
+def test_gap_out_of_range():
+    temperatures = scan(out_of_range_channels=[2])
+    assert len(temperatures) == 3 and np.all(temperatures > 0), temperatures
+
+
+def test_requested_open():
+    assert scan_error(open_channels=[3]) == ErrorCode.OPENCONNECTION
+
+
+def test_requested_out_of_range():
+    assert scan_error(out_of_range_channels=[1]) == ErrorCode.OUTOFRANGE
+
+
+if __name__ == "__main__":
+    for test in [test_gap_open, test_gap_out_of_range, test_requested_open, test_requested_out_of_range]:
+        test()
+        print(test.__name__ + ": passed")
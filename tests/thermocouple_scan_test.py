@@ -0,0 +1,47 @@
+# Compares latency of per-channel thermocouple reads against batched thermocouple scans.
+# Run from the project directory with the board connected. Channels are reconfigured as type K thermocouples.
+# Without the board, i.e. with MCC_DAQ_SIMULATE set or not on Windows, the simulated board is read instead, so results
+# only reflect its estimated latencies and are labelled as simulated.
+from importlib.machinery import SourceFileLoader
+import importlib.util
+import numpy as np
+import time
+
+# Loads classes from controller.pyw without starting the app
+loader = SourceFileLoader("controller", "controller.pyw")
+controller = importlib.util.module_from_spec(importlib.util.spec_from_loader("controller", loader))
+loader.exec_module(controller)
+Controller = controller.Controller
+
+
+def time_read(read_function, channels, repeats=20):
+    """
+    Times a thermocouple read function.
+    :param read_function: Function that takes a list of channels
+    :param channels: Channels to read
+    :param repeats: Number of reads to average
+    :return: Tuple of the form: (average latency in ms, standard deviation in ms)
+    """
+
+    # Initialize array for read times
+    read_times = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        read_function(channels)
+        read_times.append((time.perf_counter() - start) * 1000)
+
+    return np.average(read_times), np.std(read_times)
+
+
+for channel_count in [3, 8, 16]:
+
+    channels = list(range(channel_count))
+
+    Controller.initialize_thermocouple_read(channels)
+
+    before = time_read(Controller.thermocouple_instantaneous_read, channels)
+    after = time_read(Controller.thermocouple_scan_read, channels)
+
+    print(("SIMULATED " if Controller.is_simulated() else "") + f"{channel_count} channels - t_in: {before[0]:.1f} ± {before[1]:.1f} ms, "
+          f"t_in_scan: {after[0]:.1f} ± {after[1]:.1f} ms, speedup: {before[0] / after[0]:.1f}x")